@@ -0,0 +1,264 @@
+"""
+Throughput and latency benchmarks for FilesConnection.read / write.
+
+Runs every combination of protocol, input format, row count and column count
+in a fresh subprocess, so peak RSS is measured per case, and reports:
+
+- write, cold (cache miss) read and `open()` throughput in MB/s
+- p50 / p99 latency of cold reads, of `open()` reads and of cache hits
+- peak RSS of the subprocess
+
+Reads are cached in the connection's own result cache (`cache_max_bytes`),
+since `st.cache_data` never returns cached values without a Streamlit runtime.
+
+Results are saved as JSON and can be compared with an earlier run:
+
+    python benchmarks/bench_files_connection.py --output after.json
+    python benchmarks/bench_files_connection.py --compare before.json after.json
+
+The "s3" protocol runs against a local moto server and needs
+`pip install "moto[server]"`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+PROTOCOLS = ("memory", "file", "s3")
+FORMATS = ("text", "csv", "parquet")
+S3_BUCKET = "st-connection-bench"
+# Large enough that no benchmark result is ever evicted
+CACHE_MAX_BYTES = 1 << 40
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def _make_frame(rows: int, columns: int):
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(0)
+    data = {}
+    for i in range(columns):
+        if i % 4 == 3:
+            data[f"c{i}"] = rng.choice(["alpha", "beta", "gamma", "delta"], rows)
+        else:
+            data[f"c{i}"] = rng.random(rows)
+    return pd.DataFrame(data)
+
+
+def _start_moto() -> Dict[str, Any]:
+    from moto.server import ThreadedMotoServer
+
+    server = ThreadedMotoServer(port=0)
+    server.start()
+    host, port = server.get_host_and_port()
+    endpoint = f"http://{host}:{port}"
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "bench")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+    return {"client_kwargs": {"endpoint_url": endpoint, "region_name": "us-east-1"}}
+
+
+def _connect(protocol: str, workdir: str):
+    from files_connection import FilesConnection
+
+    kwargs = {}
+    if protocol == "s3":
+        kwargs = _start_moto()
+    conn = FilesConnection(
+        f"bench-{protocol}", protocol=protocol, cache_max_bytes=CACHE_MAX_BYTES, **kwargs
+    )
+
+    if protocol == "s3":
+        conn.fs.mkdir(S3_BUCKET)
+        return conn, S3_BUCKET
+    if protocol == "memory":
+        return conn, "/bench"
+    return conn, workdir
+
+
+def run_case(case: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one benchmark case; meant to be called in a fresh subprocess."""
+    protocol = case["protocol"]
+    input_format = case["format"]
+    repeat = case["repeat"]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        conn, base = _connect(protocol, workdir)
+        path = f"{base}/data-{case['rows']}x{case['columns']}.{input_format}"
+
+        df = _make_frame(case["rows"], case["columns"])
+        obj = df.to_csv(index=False) if input_format == "text" else df
+
+        start = time.perf_counter()
+        conn.write(obj, path, output_format=input_format)
+        write_seconds = time.perf_counter() - start
+        size = conn.fs.size(path)
+
+        opens = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            with conn.open(path, "rb") as f:
+                f.read()
+            opens.append(time.perf_counter() - start)
+
+        cold = []
+        for _ in range(repeat):
+            conn._result_cache.clear()
+            start = time.perf_counter()
+            conn.read(path, input_format=input_format)
+            cold.append(time.perf_counter() - start)
+
+        before = conn.cache_stats()[input_format]
+        hits = []
+        for _ in range(repeat * 10):
+            start = time.perf_counter()
+            conn.read(path, input_format=input_format)
+            hits.append(time.perf_counter() - start)
+        after = conn.cache_stats()[input_format]
+        if after["misses"] != before["misses"]:
+            raise RuntimeError(
+                f"{after['misses'] - before['misses']} of {len(hits)} reads in the "
+                "cache hit loop missed the cache"
+            )
+
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak_rss_kb //= 1024
+
+    megabytes = size / 1e6
+    return {
+        **case,
+        "bytes": size,
+        "write_mb_s": megabytes / write_seconds,
+        "read_mb_s": megabytes / statistics.median(cold),
+        "read_p50_s": _percentile(cold, 50),
+        "read_p99_s": _percentile(cold, 99),
+        "open_mb_s": megabytes / statistics.median(opens),
+        "open_p50_s": _percentile(opens, 50),
+        "open_p99_s": _percentile(opens, 99),
+        "hit_p50_s": _percentile(hits, 50),
+        "hit_p99_s": _percentile(hits, 99),
+        "peak_rss_mb": peak_rss_kb / 1024,
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for protocol in args.protocols:
+        for input_format in args.formats:
+            for rows in args.rows:
+                for columns in args.columns:
+                    case = {
+                        "protocol": protocol,
+                        "format": input_format,
+                        "rows": rows,
+                        "columns": columns,
+                        "repeat": args.repeat,
+                    }
+                    with context.Pool(1) as pool:
+                        result = pool.apply(run_case, (case,))
+                    print(
+                        f"{protocol:>6} {input_format:>7} {rows:>9}x{columns:<3} "
+                        f"read {result['read_mb_s']:8.1f} MB/s  "
+                        f"p99 {result['read_p99_s'] * 1e3:8.1f} ms  "
+                        f"open {result['open_mb_s']:8.1f} MB/s  "
+                        f"hit p50 {result['hit_p50_s'] * 1e3:6.2f} ms  "
+                        f"rss {result['peak_rss_mb']:7.1f} MB"
+                    )
+                    results.append(result)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "versions": _versions(),
+        },
+        "results": results,
+    }
+
+
+def _versions() -> Dict[str, str]:
+    versions = {}
+    for name in ("streamlit", "fsspec", "pandas", "pyarrow", "s3fs"):
+        try:
+            module = __import__(name)
+        except ImportError:
+            continue
+        versions[name] = getattr(module, "__version__", "unknown")
+    return versions
+
+
+def compare(before_path: str, after_path: str) -> None:
+    """Print the change in read throughput and hit latency between two runs."""
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+
+    key = lambda r: (r["protocol"], r["format"], r["rows"], r["columns"])
+    baseline = {key(r): r for r in before["results"]}
+    for result in after["results"]:
+        old = baseline.get(key(result))
+        if old is None:
+            continue
+        throughput = result["read_mb_s"] / old["read_mb_s"] - 1
+        hit = result["hit_p50_s"] / old["hit_p50_s"] - 1
+        protocol, input_format, rows, columns = key(result)
+        line = (
+            f"{protocol:>6} {input_format:>7} {rows:>9}x{columns:<3} "
+            f"read MB/s {throughput:+7.1%}  hit p50 {hit:+7.1%}"
+        )
+        if "open_mb_s" in old:
+            line += f"  open MB/s {result['open_mb_s'] / old['open_mb_s'] - 1:+7.1%}"
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--protocols", nargs="+", default=["memory", "file"], choices=PROTOCOLS
+    )
+    parser.add_argument("--formats", nargs="+", default=list(FORMATS), choices=FORMATS)
+    parser.add_argument(
+        "--rows", nargs="+", type=int, default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--columns", nargs="+", type=int, default=[4, 32])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default="bench_files_connection.json")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    results = run(args)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Saved results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
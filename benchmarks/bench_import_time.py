@@ -0,0 +1,86 @@
+"""
+Import-time budget check for the connection packages.
+
+Imports each package in a fresh interpreter with `python -X importtime`,
+after Streamlit itself is already imported (every app pays for that anyway),
+and reports the package's cumulative import time and which heavy
+dependencies it pulled in. Exits with status 1 if a package goes over the
+budget or imports one of the heavy dependencies eagerly:
+
+    python benchmarks/bench_import_time.py --budget-ms 30
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Any, Dict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PACKAGES = ("files_connection", "duckdb_connection")
+HEAVY_MODULES = ("pandas", "pyarrow", "duckdb", "fsspec", "s3fs", "gcsfs", "polars")
+
+_CHILD = """
+import json, sys
+import streamlit.connections, streamlit.runtime.caching
+before = set(sys.modules)
+import {package}
+new = sorted(m.split(".")[0] for m in set(sys.modules) - before)
+print(json.dumps(sorted(set(new))), file=sys.stdout)
+"""
+
+
+def measure(package: str) -> Dict[str, Any]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD.format(package=package)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    cumulative_us = None
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:"):
+            continue
+        fields = [field.strip() for field in line[len("import time:") :].split("|")]
+        if fields[2] == package:
+            cumulative_us = int(fields[1])
+
+    new_modules = json.loads(proc.stdout.strip().splitlines()[-1])
+    return {
+        "package": package,
+        "import_ms": (cumulative_us or 0) / 1000,
+        "heavy_modules": [m for m in new_modules if m in HEAVY_MODULES],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--budget-ms", type=float, default=30.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    failed = False
+    for package in PACKAGES:
+        runs = [measure(package) for _ in range(args.repeat)]
+        best = min(runs, key=lambda r: r["import_ms"])
+        over_budget = best["import_ms"] > args.budget_ms
+        failed |= over_budget or bool(best["heavy_modules"])
+        print(
+            f"{package:>20} {best['import_ms']:7.1f} ms "
+            f"(budget {args.budget_ms:.0f} ms){' OVER BUDGET' if over_budget else ''}"
+        )
+        if best["heavy_modules"]:
+            print(f"{'':>20} eagerly imports {', '.join(best['heavy_modules'])}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,385 @@
+from __future__ import annotations
+
+import json
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    FrozenSet,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Union,
+)
+
 from streamlit.connections import ExperimentalBaseConnection
 from streamlit.runtime.caching import cache_data
 
-import duckdb
-import pandas as pd
+from duckdb_connection.cursor_pool import CursorPool
+from duckdb_connection.table_versions import TableVersions, TrackedCursor
+
+# duckdb and pandas are imported on first use, so that importing the
+# connection stays cheap on pages that never query
+if TYPE_CHECKING:
+    import duckdb
+    import pandas as pd
+    import pyarrow as pa
+    from fsspec import AbstractFileSystem
+
+    from files_connection import FilesConnection
+
+# Statement types that don't change any table; anything else counts as a write
+_READ_STATEMENT_TYPES = frozenset(
+    ('SELECT', 'EXPLAIN', 'PRAGMA', 'PREPARE', 'SET', 'VARIABLE_SET', 'LOAD', 'CALL', 'RELATION')
+)
+# Writes that only change rows, as opposed to the catalog
+_DATA_STATEMENT_TYPES = frozenset(('INSERT', 'UPDATE', 'DELETE', 'COPY', 'TRANSACTION'))
+# Target table of a single INSERT / UPDATE / DELETE statement
+_WRITE_TARGET = re.compile(
+    r'\s*(?:INSERT\s+(?:OR\s+\w+\s+)?INTO|UPDATE|DELETE\s+FROM)\s+'
+    r'((?:"[^"]*"|\w+)(?:\.(?:"[^"]*"|\w+))*)',
+    re.IGNORECASE,
+)
+# First keywords of read-only statements, for duckdb versions that can't parse
+# statements ahead of execution
+_READ_KEYWORDS = frozenset(
+    ('SELECT', 'WITH', 'FROM', 'VALUES', 'TABLE', 'SHOW', 'DESCRIBE', 'SUMMARIZE',
+     'EXPLAIN', 'PRAGMA', 'SET', 'LOAD', 'PREPARE', 'CALL')
+)
+
+
+def _table_name(name: str) -> str:
+    # Unqualified and lowercased, so "main.Items" and items match
+    return name.rsplit('.', 1)[-1].strip('"').lower()
 
-class DuckDBConnection(ExperimentalBaseConnection[duckdb.DuckDBPyConnection]):
+
+def _base_tables(node: Any) -> Iterator[str]:
+    """Yield the names of the tables in a `json_serialize_sql` syntax tree."""
+    if isinstance(node, dict):
+        if node.get('type') == 'BASE_TABLE':
+            yield node['table_name']
+        for value in node.values():
+            yield from _base_tables(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _base_tables(value)
+
+
+class _Parsed(NamedTuple):
+    # duckdb.Statement, or the SQL text if it can't be parsed ahead
+    statement: Any
+    # Tables a read reads or a write writes, or None if that can't be told
+    # reliably, in which case the query depends on / invalidates every table
+    tables: Optional[FrozenSet[str]]
+    writes: bool
+    # Whether the SQL may create, drop or alter tables or views
+    changes_catalog: bool
+
+
+class DuckDBConnection(ExperimentalBaseConnection["duckdb.DuckDBPyConnection"]):
     """Basic st.connection implementation for DuckDB"""
 
+    def __init__(self, connection_name: str = 'default', **kwargs) -> None:
+        # Filesystems attached with register_filesystem(), registered again
+        # on the new duckdb connection after reset()
+        self._filesystems = {}
+        super().__init__(connection_name, **kwargs)
+
     def _connect(self, **kwargs) -> duckdb.DuckDBPyConnection:
         if 'database' in kwargs:
             db = kwargs.pop('database')
         else:
             db = self._secrets['database']
-        return duckdb.connect(database=db, **kwargs)
-    
+
+        # Setting cache_max_bytes caches query results in a per-connection
+        # cache bounded by their total size instead of st.cache_data. Each
+        # query() gets its own copy of pandas and polars results, Arrow
+        # tables are shared.
+        cache_max_bytes = kwargs.pop('cache_max_bytes', self._secrets.get('cache_max_bytes'))
+        cache_eviction = kwargs.pop('cache_eviction', self._secrets.get('cache_eviction', 'lru'))
+        self._result_cache = None
+        if cache_max_bytes is not None:
+            # Shared with FilesConnection, imported here so that duckdb
+            # queries without it don't need fsspec installed
+            from files_connection.result_cache import ResultCache
+
+            self._result_cache = ResultCache(cache_max_bytes, eviction=cache_eviction)
+
+        # Parsed statements by SQL text, reused by every query with that text
+        # and by write tracking
+        self._statement_cache_size = kwargs.pop(
+            'statement_cache_size', self._secrets.get('statement_cache_size', 128)
+        )
+        self._statements = OrderedDict()
+        self._statements_lock = threading.Lock()
+
+        # Every query runs on a cursor checked out of a pool of at most
+        # max_cursors, shared by all sessions using the connection, waiting at
+        # most cursor_wait_timeout seconds for one
+        max_cursors = kwargs.pop('max_cursors', self._secrets.get('max_cursors', 8))
+        cursor_idle_timeout = kwargs.pop(
+            'cursor_idle_timeout', self._secrets.get('cursor_idle_timeout', 300)
+        )
+        cursor_wait_timeout = kwargs.pop(
+            'cursor_wait_timeout', self._secrets.get('cursor_wait_timeout', 60)
+        )
+
+        # Bumped by writes through the connection's cursors, and part of the
+        # cache key of every query reading the written tables
+        self._table_versions = TableVersions()
+
+        import duckdb
+
+        instance = duckdb.connect(database=db, **kwargs)
+        self._pool = CursorPool(
+            instance,
+            max_size=max_cursors,
+            idle_timeout=cursor_idle_timeout,
+            wait_timeout=cursor_wait_timeout,
+        )
+        for protocol, fs in self._filesystems.items():
+            self._register(instance, protocol, fs)
+        return instance
+
+    @staticmethod
+    def _register(
+        instance: duckdb.DuckDBPyConnection, protocol: str, fs: AbstractFileSystem
+    ) -> None:
+        if protocol in instance.list_filesystems():
+            instance.unregister_filesystem(protocol)
+        instance.register_filesystem(fs)
+
+    def register_filesystem(self, files: Union[FilesConnection, AbstractFileSystem]) -> None:
+        """
+        Let queries read paths on the filesystem of a FilesConnection (or any
+        fsspec filesystem), using its credentials, so DuckDB reads only the
+        columns, row groups and byte ranges it needs instead of the whole file.
+        Replaces any filesystem already registered for the same protocol.
+
+        ```python
+        files = st.experimental_connection('s3', type=FilesConnection)
+        conn.register_filesystem(files)
+        conn.query("select count(*) from read_parquet('s3://my-bucket/*.parquet')")
+        ```
+
+        Paths must use the filesystem's protocol, e.g. "s3://" or "gcs://".
+        Results of queries over files aren't invalidated when the files
+        change, so pick `ttl` accordingly.
+        """
+        from files_connection import FilesConnection
+
+        fs = files.fs if isinstance(files, FilesConnection) else files
+        protocol = fs.protocol if isinstance(fs.protocol, str) else fs.protocol[0]
+        self._register(self._instance, protocol, fs)
+        self._filesystems[protocol] = fs
+
     def cursor(self) -> duckdb.DuckDBPyConnection:
-        return self._instance.cursor()
-
-    def query(self, query: str, ttl: int = 3600, **kwargs) -> pd.DataFrame:
-        @cache_data(ttl=ttl)
-        def _query(query: str, **kwargs) -> pd.DataFrame:
-            cursor = self.cursor()
-            cursor.execute(query, **kwargs)
-            return cursor.df()
-        
-        return _query(query, **kwargs)
+        """
+        Get a new cursor, which the caller owns and should close. Prefer
+        `checkout()`, which reuses pooled cursors.
+
+        Writes made through the cursor invalidate cached `query()` results
+        that read the written tables.
+        """
+        return TrackedCursor(self._instance.cursor(), self._record_write)
+
+    @contextmanager
+    def checkout(self) -> Iterator[duckdb.DuckDBPyConnection]:
+        """
+        Check out a cursor from the connection's pool for the duration of a
+        `with` block, waiting if `max_cursors` are already checked out. Raises
+        TimeoutError after waiting `cursor_wait_timeout` seconds (default 60).
+        Queries run inside the block don't wait, so they can't deadlock on
+        the block's own cursor.
+
+        ```python
+        with conn.checkout() as cursor:
+            cursor.execute("INSERT INTO items VALUES (?, ?, ?)", ['laptop', 2000, 1])
+        ```
+        """
+        with self._pool.checkout() as cursor:
+            yield TrackedCursor(cursor, self._record_write)
+
+    def pool_stats(self) -> Dict[str, float]:
+        """
+        Get the state of the cursor pool: cursors `in_use` and `idle`, the
+        `max_size`, the number of `checkouts` and of those that had to wait
+        (`waits`), the average and maximum wait in seconds (`avg_wait`,
+        `max_wait`), and the number of cursors `created` and `closed`.
+        """
+        return self._pool.stats()
+
+    def _parse(self, query: str) -> _Parsed:
+        """
+        Get `query` parsed, with the tables it references and whether it
+        writes, from the connection's LRU of statements, parsing it on a miss.
+        """
+        with self._statements_lock:
+            if query in self._statements:
+                self._statements.move_to_end(query)
+                return self._statements[query]
+
+        tables = None
+        if hasattr(self._instance, 'extract_statements'):
+            statements = self._instance.extract_statements(query)
+            types = [s.type.name for s in statements]
+            writes = any(t not in _READ_STATEMENT_TYPES for t in types)
+            changes_catalog = any(
+                t not in _READ_STATEMENT_TYPES and t not in _DATA_STATEMENT_TYPES for t in types
+            )
+            # Multiple statements can't take one set of parameters
+            statement = statements[0] if len(statements) == 1 else query
+            if types in (['INSERT'], ['UPDATE'], ['DELETE']):
+                target = _WRITE_TARGET.match(query)
+                if target:
+                    tables = frozenset((_table_name(target.group(1)),))
+        else:
+            keyword = query.lstrip(' \t\n(').split(None, 1)[:1]
+            writes = not keyword or keyword[0].upper() not in _READ_KEYWORDS
+            changes_catalog = writes
+            statement = query
+
+        if not writes:
+            tables = self._tables_read(query)
+
+        parsed = _Parsed(statement, tables, writes, changes_catalog)
+        with self._statements_lock:
+            self._statements[query] = parsed
+            while len(self._statements) > self._statement_cache_size:
+                self._statements.popitem(last=False)
+        return parsed
+
+    def _execute(self, cursor, query: str, params):
+        if params is None:
+            return cursor.execute(self._parse(query).statement)
+        return cursor.execute(self._parse(query).statement, params)
+
+    def _tables_read(self, query: str) -> Optional[FrozenSet[str]]:
+        """
+        Get the tables `query` reads, or None if duckdb can't tell, or if it
+        reads a view.
+        """
+        cursor = self._instance.cursor()
+        try:
+            try:
+                names = self._instance.get_table_names(query)
+            except Exception:
+                # get_table_names can't bind parameters, while the serialized
+                # syntax tree doesn't need them
+                serialized = cursor.execute('SELECT json_serialize_sql(?)', [query])
+                tree = json.loads(serialized.fetchone()[0])
+                if tree.get('error'):
+                    return None
+                names = set(_base_tables(tree))
+            views = cursor.execute('SELECT view_name FROM duckdb_views()').fetchall()
+        except Exception:
+            return None
+        finally:
+            cursor.close()
+
+        tables = frozenset(_table_name(name) for name in names)
+        # A view reads tables the parser doesn't see
+        if tables & {view.lower() for (view,) in views}:
+            return None
+        return tables
+
+    def _record_write(self, query) -> None:
+        # Runs after the statement succeeded, so it must never raise; if the
+        # statement can't be parsed, assume it wrote to every table
+        try:
+            query = getattr(query, 'query', query)
+            if not isinstance(query, str):
+                return
+            parsed = self._parse(query)
+        except Exception:
+            self._table_versions.bump(None)
+            return
+
+        if not parsed.writes:
+            return
+        if parsed.changes_catalog:
+            # Parsed reads may now refer to views
+            with self._statements_lock:
+                self._statements.clear()
+        self._table_versions.bump(parsed.tables)
+
+    def _cache_decorator(self, ttl):
+        if self._result_cache is not None:
+            return self._result_cache.memoize(ttl=ttl)
+        return cache_data(ttl=ttl)
+
+    def query(
+        self,
+        query: str,
+        ttl: int = 3600,
+        return_type: str = 'pandas',
+        params: Optional[Union[Sequence, dict]] = None,
+        **kwargs,
+    ) -> pd.DataFrame:
+        """
+        Run `query` and return the result. Cached by default.
+
+        Values should be passed as bind parameters with `params=`, a list for
+        `?` / `$1` placeholders or a dict for `$name` ones, rather than
+        formatted into the SQL. The parsed statement is then reused for every
+        value, and results are cached per (statement, params).
+
+        Cached results are invalidated when a table the query reads is written
+        through this connection's cursors (`cursor()`, `checkout()`), so `ttl`
+        only needs to cover changes made by other processes.
+
+        `return_type` is "pandas" (default), "arrow" for a pyarrow.Table
+        exported by DuckDB without copying, or "polars" for a polars.DataFrame
+        built from that Arrow result.
+        """
+        if return_type not in ('pandas', 'arrow', 'polars'):
+            raise ValueError(f"{return_type} is not a valid value for `return_type=`.")
+
+        @self._cache_decorator(ttl)
+        def _query(
+            query: str, return_type: str, params, table_versions, **kwargs
+        ) -> pd.DataFrame:
+            # table_versions is only part of the cache key
+            with self.checkout() as cursor:
+                if kwargs:
+                    cursor.execute(query, **kwargs)
+                else:
+                    self._execute(cursor, query, params)
+                if return_type == 'arrow':
+                    # arrow() returns a one-shot RecordBatchReader on newer
+                    # duckdb, which can't be cached
+                    if hasattr(cursor, 'to_arrow_table'):
+                        return cursor.to_arrow_table()
+                    return cursor.fetch_arrow_table()
+                if return_type == 'polars':
+                    return cursor.pl()
+                return cursor.df()
+
+        table_versions = self._table_versions.key(self._parse(query).tables)
+        return _query(query, return_type, params, table_versions, **kwargs)
+
+    def query_batches(
+        self,
+        query: str,
+        batch_size: int = 1_000_000,
+        params: Optional[Union[Sequence, dict]] = None,
+    ) -> Iterator[pa.RecordBatch]:
+        """
+        Run `query` and yield the result as pyarrow.RecordBatches of up to
+        `batch_size` rows, without materializing the whole result. Not cached.
+
+        Holds a pooled cursor until the iterator is exhausted or closed.
+        """
+        with self.checkout() as cursor:
+            self._execute(cursor, query, params)
+            reader = cursor.fetch_record_batch(batch_size)
+            while True:
+                try:
+                    yield reader.read_next_batch()
+                except StopIteration:
+                    return
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Deque, Dict, Iterator, Optional, Tuple
+
+if TYPE_CHECKING:
+    import duckdb
+
+
+class CursorPool:
+    """
+    Bounded pool of cursors on one DuckDB connection, shared by every thread.
+
+    A DuckDB cursor must not be used by two threads at once, so each checkout
+    gets a cursor to itself. At most `max_size` cursors are checked out at a
+    time; further checkouts wait up to `wait_timeout` seconds for one to be
+    returned, then raise TimeoutError. A thread that already has a cursor
+    checked out doesn't wait, since the cursor it would wait for may be its
+    own. Returned cursors have any open transaction rolled back and are
+    reused, and are closed once idle for more than `idle_timeout` seconds.
+    """
+
+    def __init__(
+        self,
+        connection: duckdb.DuckDBPyConnection,
+        max_size: int = 8,
+        idle_timeout: Optional[float] = 300,
+        wait_timeout: Optional[float] = 60,
+    ) -> None:
+        if max_size < 1:
+            raise ValueError(f"{max_size} is not a valid value for `max_cursors=`.")
+
+        self._connection = connection
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.wait_timeout = wait_timeout
+        # Number of cursors each thread has checked out
+        self._held = threading.local()
+        # (cursor, time it was returned), most recently returned last
+        self._idle: Deque[Tuple[duckdb.DuckDBPyConnection, float]] = deque()
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self._counters = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "created": 0,
+            "closed": 0,
+        }
+
+    def _close_idle(self, now: float) -> None:
+        if self.idle_timeout is None:
+            return
+        while self._idle and now - self._idle[0][1] > self.idle_timeout:
+            cursor, _ = self._idle.popleft()
+            cursor.close()
+            self._counters["closed"] += 1
+
+    @staticmethod
+    def _reset(cursor: duckdb.DuckDBPyConnection) -> bool:
+        """
+        Roll back any transaction left open on `cursor`, so it isn't shared
+        with the next checkout. Returns False if the cursor can't be reused.
+        """
+        try:
+            # Every autocommitted statement gets its own transaction id, while
+            # the statements of an open transaction share one
+            first = cursor.execute("SELECT txid_current()").fetchone()
+            if cursor.execute("SELECT txid_current()").fetchone() == first:
+                cursor.rollback()
+        except Exception:
+            # e.g. the transaction was aborted by an error
+            try:
+                cursor.rollback()
+            except Exception:
+                return False
+        return True
+
+    @contextmanager
+    def checkout(self) -> Iterator[duckdb.DuckDBPyConnection]:
+        """Check out a cursor for the duration of the `with` block."""
+        start = time.perf_counter()
+        nested = getattr(self._held, "count", 0) > 0
+        with self._cond:
+            waited = False
+            while self._in_use >= self.max_size and not nested:
+                waited = True
+                remaining = None
+                if self.wait_timeout is not None:
+                    remaining = self.wait_timeout - (time.perf_counter() - start)
+                if not self._cond.wait(remaining) and remaining is not None:
+                    raise TimeoutError(
+                        f"Timed out after {self.wait_timeout}s waiting for one of "
+                        f"{self.max_size} cursors, consider raising `max_cursors=`."
+                    )
+            self._in_use += 1
+
+            wait = time.perf_counter() - start
+            self._counters["checkouts"] += 1
+            if waited:
+                self._counters["waits"] += 1
+                self._counters["wait_seconds"] += wait
+                self._counters["max_wait_seconds"] = max(
+                    self._counters["max_wait_seconds"], wait
+                )
+
+            self._close_idle(time.monotonic())
+            cursor = self._idle.pop()[0] if self._idle else None
+
+        try:
+            if cursor is None:
+                cursor = self._connection.cursor()
+                with self._cond:
+                    self._counters["created"] += 1
+        except BaseException:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        self._held.count = getattr(self._held, "count", 0) + 1
+        try:
+            yield cursor
+        except BaseException:
+            # The cursor may be left mid-transaction or mid-result, so don't
+            # hand it to anyone else
+            cursor.close()
+            with self._cond:
+                self._counters["closed"] += 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        finally:
+            self._held.count -= 1
+
+        reusable = self._reset(cursor)
+        if not reusable:
+            cursor.close()
+        with self._cond:
+            if reusable:
+                self._idle.append((cursor, time.monotonic()))
+            else:
+                self._counters["closed"] += 1
+            self._in_use -= 1
+            self._cond.notify()
+
+    def stats(self) -> Dict[str, float]:
+        with self._cond:
+            waits = self._counters["waits"]
+            return {
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "max_size": self.max_size,
+                "checkouts": self._counters["checkouts"],
+                "waits": waits,
+                "avg_wait": self._counters["wait_seconds"] / waits if waits else 0.0,
+                "max_wait": self._counters["max_wait_seconds"],
+                "created": self._counters["created"],
+                "closed": self._counters["closed"],
+            }
+
+    def close(self) -> None:
+        """Close every idle cursor."""
+        with self._cond:
+            while self._idle:
+                self._idle.popleft()[0].close()
+                self._counters["closed"] += 1
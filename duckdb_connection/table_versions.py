@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, FrozenSet, Optional, Tuple
+
+if TYPE_CHECKING:
+    import duckdb
+
+
+class TableVersions:
+    """
+    Thread-safe write counters per table, used as part of the cache key of
+    query results so a write only invalidates results that read its tables.
+
+    Writes whose target table isn't known for sure bump a generation shared
+    by every table, as do transaction statements, since a commit can make any
+    earlier write visible.
+    """
+
+    def __init__(self) -> None:
+        self._versions: Dict[str, int] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def bump(self, tables: Optional[FrozenSet[str]]) -> None:
+        with self._lock:
+            if not tables:
+                self._generation += 1
+                return
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+    def key(self, tables: Optional[FrozenSet[str]]) -> Tuple:
+        """
+        Get the versions of `tables`, or of every table if they're unknown,
+        for a cache key.
+        """
+        with self._lock:
+            if tables is None:
+                return (self._generation, tuple(sorted(self._versions.items())))
+            return (self._generation,) + tuple(
+                (table, self._versions.get(table, 0)) for table in sorted(tables)
+            )
+
+
+def _tracked(name: str) -> Callable:
+    def method(self, query, *args, **kwargs):
+        result = getattr(self._cursor, name)(query, *args, **kwargs)
+        self._on_execute(query)
+        return result
+
+    method.__name__ = name
+    return method
+
+
+class TrackedCursor:
+    """
+    Proxy for a DuckDB cursor that passes every statement it runs to
+    `on_execute` once it succeeds, so writes can invalidate cached results.
+    Everything else is forwarded to the cursor.
+    """
+
+    def __init__(
+        self, cursor: duckdb.DuckDBPyConnection, on_execute: Callable[[Any], None]
+    ) -> None:
+        self._cursor = cursor
+        self._on_execute = on_execute
+
+    execute = _tracked("execute")
+    executemany = _tracked("executemany")
+    sql = _tracked("sql")
+    query = _tracked("query")
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+    def __enter__(self) -> TrackedCursor:
+        self._cursor.__enter__()
+        return self
+
+    def __exit__(self, *exc_info) -> Any:
+        return self._cursor.__exit__(*exc_info)
@@ -14,44 +14,413 @@
 
 from __future__ import annotations
 
-from contextlib import contextmanager
-from datetime import timedelta
-from io import TextIOWrapper
+import asyncio
+import json
+import posixpath
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import partial
+from glob import has_magic
+from io import BytesIO, TextIOWrapper
 from pathlib import Path
-from typing import TYPE_CHECKING, Iterator, Optional, Union, overload
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+    overload,
+)
 from typing_extensions import Literal
 
-import pandas as pd
-
 from streamlit.connections import ExperimentalBaseConnection
 from streamlit.runtime.caching import cache_data
 
+from files_connection import fs_pool
+from files_connection.disk_cache import DiskCache, object_version
+from files_connection.listing import ListingIndex
+from files_connection.partitioning import discover_partitioned_files, partition_key_types
+from files_connection.result_cache import ResultCache, sizeof
+from files_connection.stats import ReadStats
+
+# pandas, pyarrow and the fsspec drivers are imported on first use, so that
+# importing the connection stays cheap on pages that never read a file
 if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
     from fsspec import AbstractFileSystem, filesystem
+    from fsspec.asyn import AbstractAsyncStreamedFile, AsyncFileSystem
     from fsspec.spec import AbstractBufferedFile
 
 
+# Connection options read from secrets or kwargs, rather than passed on to
+# the fsspec filesystem
+_CONNECTION_OPTIONS = (
+    "disk_cache_dir",
+    "disk_cache_max_bytes",
+    "disk_cache_eviction",
+    "async_concurrency",
+    "block_size",
+    "cache_type",
+    "cache_options",
+    "listing_ttl",
+    "cache_max_bytes",
+    "cache_eviction",
+    "pool_size",
+    "pool_idle_timeout",
+)
+
+_INPUT_FORMATS = ("text", "bytes", "csv", "parquet", "feather", "orc", "ndjson")
+_OUTPUT_FORMATS = ("text", "bytes", "csv", "parquet", "feather", "orc")
+# Row-oriented formats, which are decompressed as a stream when compressed
+_ROW_FORMATS = ("text", "csv", "ndjson")
+_LOCAL_PROTOCOLS = ("file", "local")
+_FORMAT_EXTENSIONS = {
+    ".txt": "text",
+    ".log": "text",
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".feather": "feather",
+    ".arrow": "feather",
+    ".ipc": "feather",
+    ".orc": "orc",
+    # Not ".json", which is usually a single document or array
+    ".jsonl": "ndjson",
+    ".ndjson": "ndjson",
+}
+# Leading bytes of the formats and compression codecs, for files whose
+# extension doesn't say what they are
+_FORMAT_MAGIC = (
+    (b"PAR1", "parquet"),
+    (b"ARROW1", "feather"),
+    (b"FEA1", "feather"),
+    (b"ORC", "orc"),
+)
+_COMPRESSION_MAGIC = (
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bz2"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+    (b"\xfd7zXZ\x00", "xz"),
+)
+
+ReturnType = Literal["pandas", "arrow", "polars"]
+# (start, end) offsets as accepted by fsspec's cat_file: end is exclusive,
+# None reads to the end of the object and negative values count from the end
+ByteRange = Tuple[Optional[int], Optional[int]]
+_RETURN_TYPES = ("pandas", "arrow", "polars")
+
+
+def _from_arrow(table: "pa.Table | pa.RecordBatch", return_type: str):
+    """Convert a pyarrow.Table or RecordBatch to the requested return type."""
+    if return_type == "arrow":
+        return table
+    if return_type == "polars":
+        import polars as pl
+
+        return pl.from_arrow(table)
+    return table.to_pandas()
+
+
+@dataclass
+class _TailState:
+    """What `read_incremental()` has read so far from one file."""
+
+    version: str
+    size: int
+    # Bytes consumed so far, always at the end of a complete line
+    offset: int
+    # The bytes just before `offset`, to check the file was only appended to
+    fingerprint: bytes
+    header: bytes
+    result: Any
+
+
+# Number of bytes before the last read offset compared to detect rewrites
+_TAIL_FINGERPRINT_BYTES = 256
+
+
+def _infer_from_extension(path: str | Path) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Infer the input format and compression of a file from its extension,
+    e.g. ("ndjson", "zstd") for "events.jsonl.zst". Either may be None.
+    """
+    from fsspec.utils import infer_compression
+
+    name = str(path)
+    compression = infer_compression(name)
+    if compression is not None:
+        name = posixpath.splitext(name)[0]
+    input_format = _FORMAT_EXTENSIONS.get(posixpath.splitext(name)[1].lower())
+    return input_format, compression
+
+
+def _pop_cache_key_kwargs(kwargs: dict) -> None:
+    """
+    Remove the arguments that are only passed to cached readers to make the
+    cache key specific to a connection and to a version of the objects read.
+    """
+    for key in ("connection_name", "object_version", "write_generation"):
+        kwargs.pop(key, None)
+
+
+def _sniff_compression(head: bytes) -> Optional[str]:
+    """Get the compression codec of a file from its first bytes, if any."""
+    for magic, codec in _COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return codec
+    return None
+
+
+def _sniff_format(head: bytes, first_line: Callable[[], bytes]) -> Optional[str]:
+    """
+    Infer the input format of a file from its first uncompressed bytes, or
+    return None. `first_line` is only called for what may be ndjson.
+    """
+    for magic, input_format in _FORMAT_MAGIC:
+        if head.startswith(magic):
+            return input_format
+    if head.lstrip().startswith(b"{"):
+        # Newline-delimited only if the first line is a whole object,
+        # rather than the start of a pretty-printed document
+        try:
+            if isinstance(json.loads(first_line()), dict):
+                return "ndjson"
+        except ValueError:
+            pass
+    return None
+
+
+def _parse_fetched(
+    path: str | Path,
+    data: bytes,
+    input_format: Optional[str],
+    return_type: str,
+    compression: Optional[str] = None,
+    **kwargs,
+):
+    """
+    Parse the raw contents of `path`, inferring its format and compression
+    and decompressing it the way `read()` does for files.
+    """
+    from fsspec.compression import compr
+
+    inferred_format, inferred_compression = _infer_from_extension(path)
+    input_format = input_format or inferred_format
+    if compression is None:
+        compression = inferred_compression
+        if compression is None and input_format is None:
+            compression = _sniff_compression(data)
+    if compression is not None and input_format in (None,) + _ROW_FORMATS:
+        with compr[compression](BytesIO(data), mode="rb") as f:
+            data = f.read()
+
+    if input_format is None:
+        first_line = lambda: data.split(b"\n", 1)[0][: 1 << 16]
+        input_format = _sniff_format(data[:8], first_line)
+        if input_format is None:
+            raise ValueError(
+                f"Couldn't infer the format of `{path}`, pass `input_format=`."
+            )
+    return _parse_bytes(data, input_format, return_type, **kwargs)
+
+
+def _parse_bytes(data: bytes, input_format: str, return_type: str, **kwargs):
+    """Parse the raw contents of a file already fetched into memory."""
+    if input_format == "bytes":
+        return data
+    if input_format == "text":
+        return data.decode(kwargs.get("encoding") or "utf-8")
+    if input_format == "csv" and return_type == "pandas":
+        import pandas as pd
+
+        return pd.read_csv(BytesIO(data), **kwargs)
+
+    import pyarrow as pa
+
+    buffer = pa.BufferReader(data)
+    if input_format == "csv":
+        from pyarrow import csv
+
+        table = csv.read_csv(buffer, **kwargs)
+    elif input_format == "feather":
+        from pyarrow import feather
+
+        table = feather.read_table(buffer, **kwargs)
+    elif input_format == "orc":
+        from pyarrow import orc
+
+        table = orc.read_table(buffer, **kwargs)
+    elif input_format == "ndjson":
+        from pyarrow import json as arrow_json
+
+        table = arrow_json.read_json(buffer, **kwargs)
+    else:
+        import pyarrow.parquet as pq
+
+        if return_type == "pandas":
+            kwargs.setdefault("use_pandas_metadata", True)
+        table = pq.read_table(buffer, **kwargs)
+    return _from_arrow(table, return_type)
+
+
+def _to_arrow(obj, preserve_index: Optional[bool] = None) -> "pa.Table":
+    """Convert a pandas.DataFrame, polars.DataFrame or pyarrow.Table to Arrow."""
+    import pyarrow as pa
+
+    if isinstance(obj, pa.Table):
+        return obj
+    if hasattr(obj, "to_arrow"):
+        return obj.to_arrow()
+    return pa.Table.from_pandas(obj, preserve_index=preserve_index)
+
+
+def _concat(parts: List, input_format: str, return_type: str):
+    """Concatenate per-file results from a multi-file read."""
+    if input_format == "text":
+        return "".join(parts)
+    if input_format == "bytes":
+        return b"".join(parts)
+    if return_type == "arrow":
+        import pyarrow as pa
+
+        return pa.concat_tables(parts)
+    if return_type == "polars":
+        import polars as pl
+
+        return pl.concat(parts)
+
+    import pandas as pd
+
+    return pd.concat(parts, ignore_index=True)
+
+
+def _tail_result(result: Any, return_type: str) -> Any:
+    """Return a `read_incremental()` result without sharing mutable state."""
+    if result is None or isinstance(result, str):
+        return result
+    if return_type == "polars":
+        return _from_arrow(result, return_type)
+    if return_type == "pandas":
+        return result.copy()
+    return result
+
+
+def _concat_promoting(tables: List["pa.Table"]) -> "pa.Table":
+    """
+    Concatenate pyarrow Tables whose types were inferred separately: columns
+    missing from a table are filled with nulls, integers mixed with floats
+    become float64, and any other type mismatch becomes a string.
+    """
+    import pyarrow as pa
+
+    types: Dict[str, "pa.DataType"] = {}
+    for table in tables:
+        for field in table.schema:
+            current = types.get(field.name)
+            if current is None or pa.types.is_null(current):
+                types[field.name] = field.type
+            elif current == field.type or pa.types.is_null(field.type):
+                continue
+            elif pa.types.is_integer(current) and pa.types.is_integer(field.type):
+                types[field.name] = pa.int64()
+            elif all(
+                pa.types.is_integer(t) or pa.types.is_floating(t)
+                for t in (current, field.type)
+            ):
+                types[field.name] = pa.float64()
+            else:
+                types[field.name] = pa.string()
+
+    schema = pa.schema(list(types.items()))
+    aligned = []
+    for table in tables:
+        for name, kind in types.items():
+            if name not in table.column_names:
+                table = table.append_column(name, pa.nulls(len(table), kind))
+        aligned.append(table.select(schema.names).cast(schema))
+    return pa.concat_tables(aligned)
+
+
 class FilesConnection(ExperimentalBaseConnection["AbstractFileSystem"]):
 
     def __init__(
         self, connection_name: str = "default", protocol: str | None = None, **kwargs
     ) -> None:
         self.protocol = protocol
+        # Cached readers by ttl, and read counters for cache_stats()
+        self._readers = {}
+        self._local = threading.local()
+        self._stats = ReadStats()
+        self._csv_schemas = {}
+        self._tails = {}
+        # One lock per tailed file, so reads of different files don't wait on
+        # each other's requests; _tails_lock only guards creating them
+        self._tail_locks = {}
+        self._tails_lock = threading.Lock()
         super().__init__(connection_name, **kwargs)
 
     def _connect(self, **kwargs) -> "AbstractFileSystem":
         """
         Pass a protocol such as "s3", "gcs", or "file"
+
+        Remote objects can also be cached on local disk across restarts by
+        setting `disk_cache_dir` (and optionally `disk_cache_max_bytes` and
+        `disk_cache_eviction`, "lru" or "fifo") in the connection's secrets.
+        `async_concurrency` limits concurrent requests from `aread()` and
+        `aopen()` per event loop (default 32).
+
+        `block_size`, `cache_type` (e.g. "readahead", "blockcache", "bytes" or
+        "background", which prefetches the next block) and `cache_options`
+        set the defaults for every file opened through this connection.
+
+        `listing_ttl` sets how long, in seconds, each directory listing used
+        by `ls()`, `find()`, `glob()` and `info()` is cached (default 60).
+
+        Setting `cache_max_bytes` caches `read()` results in a per-connection
+        cache bounded by their total size in bytes instead of
+        `st.cache_data`, evicting by `cache_eviction` ("lru", "lfu" or
+        "cost"). Each `read()` returns its own copy of pandas and polars
+        results; other results are shared and shouldn't be mutated.
+
+        Async filesystems (S3, GCS, ...) are shared by all connections in the
+        process with the same protocol and credentials, including across
+        `reset()`, so they reuse HTTP sessions and keep-alive connections.
+        `pool_size` sets the size of the HTTP connection pool (S3), and
+        `pool_idle_timeout` drops a shared filesystem that hasn't been
+        requested for that many seconds. Sync filesystems such as sftp aren't
+        thread-safe and use fsspec's per-thread instances.
         """
         from fsspec import AbstractFileSystem, filesystem
         from fsspec.spec import AbstractBufferedFile
 
         secrets = self._secrets.to_dict()
         protocol = secrets.pop("protocol", self.protocol)
+        options = {
+            key: kwargs.pop(key, secrets.pop(key, None)) for key in _CONNECTION_OPTIONS
+        }
 
         if protocol is None:
             protocol = "file"
 
+        self._disk_cache = None
+        if options["disk_cache_dir"] is not None and protocol != "file":
+            self._disk_cache = DiskCache(
+                options["disk_cache_dir"],
+                max_bytes=options["disk_cache_max_bytes"],
+                eviction=options["disk_cache_eviction"] or "lru",
+            )
+
         if protocol == "gcs" and secrets:
             secrets = {"token": secrets}
 
@@ -59,8 +428,32 @@ class FilesConnection(ExperimentalBaseConnection["AbstractFileSystem"]):
             self.protocol = protocol
         
         secrets.update(kwargs)
+        secrets = fs_pool.with_pool_size(protocol, secrets, options["pool_size"])
+
+        self._storage_options = secrets
+        self._async_concurrency = options["async_concurrency"] or 32
+        self._async_state = weakref.WeakKeyDictionary()
+        self._write_generations = {}
+        self._result_cache = None
+        if options["cache_max_bytes"] is not None:
+            self._result_cache = ResultCache(
+                options["cache_max_bytes"],
+                eviction=options["cache_eviction"] or "lru",
+            )
+        self._open_defaults = {
+            key: options[key]
+            for key in ("block_size", "cache_type", "cache_options")
+            if options[key] is not None
+        }
 
-        fs = filesystem(protocol, **secrets)
+        fs = fs_pool.pool.get(
+            protocol, secrets, idle_timeout=options["pool_idle_timeout"]
+        )
+
+        listing_ttl = options["listing_ttl"]
+        self._listing_index = ListingIndex(
+            fs, ttl=60 if listing_ttl is None else listing_ttl
+        )
 
         return fs
     
@@ -68,6 +461,41 @@ class FilesConnection(ExperimentalBaseConnection["AbstractFileSystem"]):
     def fs(self) -> "AbstractFileSystem":
         return self._instance
 
+    def ls(
+        self, path: str | Path, detail: bool = False, refresh: bool = False
+    ) -> List[str] | List[Dict[str, Any]]:
+        """
+        List the directory at `path`. Cached for `listing_ttl` seconds per
+        directory, pass `refresh=True` to list it again.
+        """
+        return self._listing_index.ls(str(path), detail=detail, refresh=refresh)
+
+    def find(
+        self,
+        path: str | Path,
+        maxdepth: Optional[int] = None,
+        withdirs: bool = False,
+        detail: bool = False,
+    ) -> List[str] | Dict[str, Dict[str, Any]]:
+        """
+        List all files below `path`, walking the cached directory listings.
+        Only directories whose listing has expired are listed again.
+        """
+        return self._listing_index.find(
+            str(path), maxdepth=maxdepth, withdirs=withdirs, detail=detail
+        )
+
+    def glob(self, pattern: str, refresh: bool = False) -> List[str]:
+        """
+        Find the paths matching a glob pattern using the cached listings, pass
+        `refresh=True` to list the searched directories again.
+        """
+        return self._listing_index.glob(pattern, refresh=refresh)
+
+    def info(self, path: str | Path, refresh: bool = False) -> Dict[str, Any]:
+        """Get the metadata for `path`, from its parent's cached listing if present."""
+        return self._listing_index.info(str(path), refresh=refresh)
+
     def open(
         self, path: str | Path, mode: str = "rb", *args, **kwargs
     ) -> Iterator[TextIOWrapper | AbstractBufferedFile]:
@@ -75,13 +503,26 @@ class FilesConnection(ExperimentalBaseConnection["AbstractFileSystem"]):
         # connection-specific
         if "connection_name" in kwargs:
             kwargs.pop("connection_name")
+        for key, value in self._open_defaults.items():
+            kwargs.setdefault(key, value)
+
+        if self._disk_cache is not None and "r" in mode:
+            from fsspec.implementations.local import LocalFileSystem
+
+            local_path = self._disk_cache.fetch(self.fs, path)
+            if local_path is not None:
+                try:
+                    return LocalFileSystem().open(local_path, mode, *args, **kwargs)
+                except FileNotFoundError:
+                    # Evicted by another thread or process since fetch()
+                    pass
 
         return self.fs.open(path, mode, *args, **kwargs)
 
     @overload
     def read(
         self,
-        path: str | Path,
+        path: str | Path | List[str | Path],
         input_format: Literal["text"],
         ttl: Optional[Union[float, int, timedelta]] = None,
         **kwargs,
@@ -91,62 +532,907 @@ class FilesConnection(ExperimentalBaseConnection["AbstractFileSystem"]):
     @overload
     def read(
         self,
-        path: str | Path,
-        input_format: Literal["csv"],
+        path: str | Path | List[str | Path],
+        input_format: Literal["bytes"],
         ttl: Optional[Union[float, int, timedelta]] = None,
         **kwargs,
-    ) -> pd.DataFrame:
+    ) -> bytes:
         pass
 
     @overload
     def read(
         self,
-        path: str | Path,
-        input_format: Literal["parquet"],
+        path: str | Path | List[str | Path],
+        input_format: Literal["csv", "parquet", "feather", "orc", "ndjson"],
         ttl: Optional[Union[float, int, timedelta]] = None,
+        return_type: Literal["pandas"] = "pandas",
         **kwargs,
-    ) -> pd.DataFrame:
+    ) -> "pd.DataFrame":
         pass
 
+    @overload
     def read(
         self,
-        path: str | Path,
+        path: str | Path | List[str | Path],
+        input_format: Literal["csv", "parquet", "feather", "orc", "ndjson"],
+        ttl: Optional[Union[float, int, timedelta]] = None,
+        return_type: Literal["arrow"] = ...,
+        **kwargs,
+    ) -> "pa.Table":
+        pass
+
+    def read(
+        self,
+        path: str | Path | List[str | Path],
         input_format: str = None,
         ttl: Optional[Union[float, int, timedelta]] = None,
+        return_type: ReturnType = "pandas",
+        max_workers: Optional[int] = None,
+        validate: bool = False,
+        dataset: bool = False,
         **kwargs,
     ):
-        @cache_data(ttl=ttl, show_spinner="Running `files.read(...)`.")
-        def _read_text(path: str | Path, **kwargs) -> str:
-            if "connection_name" in kwargs:
-                kwargs.pop("connection_name")
+        """
+        Read the file at `path` and return its contents. Cached by default.
 
-            with self.open(path, "rt", **kwargs) as f:
-                return f.read()
+        `return_type` selects the result type for tabular formats: "pandas"
+        (default) returns a pandas.DataFrame, "arrow" returns a pyarrow.Table
+        read directly with pyarrow, and "polars" returns a polars.DataFrame
+        built from that table without going through pandas.
+
+        For parquet, `columns=` and `filters=` (in pyarrow's DNF format, e.g.
+        `[("year", "=", 2023)]`) are pushed down to the reader, so row groups
+        that can't match are skipped and only the requested columns are
+        fetched. Both are part of the cache key.
+
+        `path` may also be a list of paths or a glob pattern such as
+        "bucket/events/*.parquet". The matching files are fetched and parsed
+        concurrently on up to `max_workers` threads and returned as a single
+        concatenated result. Patterns are matched against the cached
+        directory listings, which may be up to `listing_ttl` seconds old, so
+        files added since by anything but this connection can be missed;
+        pass `conn.glob(pattern, refresh=True)` instead to list them again.
+
+        With `validate=True`, every call makes a cheap metadata request
+        (`fs.info()`) and the object's ETag, generation or mtime and size
+        become part of the cache key. Unchanged objects are served from the
+        cache and only changed ones are fetched again, so `ttl` only bounds
+        how long old versions are kept around.
+
+        "bytes" returns the raw contents. For "text" and "bytes",
+        `byte_range=(start, end)` fetches only that part of the object with a
+        single ranged request, e.g. `(0, 1024)` for the header or
+        `(-65536, None)` for the tail of a large log.
+
+        "orc" reads ORC files and "ndjson" newline-delimited JSON, parsed with
+        pyarrow's block-parallel JSON reader. If `input_format` isn't given,
+        it's inferred from the file extension or, failing that, the file's
+        first bytes. Compressed text, csv and ndjson files (gzip, bz2, zstd,
+        xz) are decompressed as a stream, based on the extension or, when
+        the format is inferred, the file's first bytes.
+
+        "feather" reads Feather / Arrow IPC files. For local files, Parquet
+        and Feather are memory-mapped, and Feather read with an "arrow" or
+        "polars" `return_type` is zero-copy and bypasses the cache so that
+        sessions share the OS page cache instead of holding private copies.
+
+        With `dataset=True`, `path` is the root of a Hive-partitioned dataset
+        (`year=2024/month=05/...`) in "parquet", "csv", "feather" or "orc"
+        format.
+        Partition keys become columns, and directories whose partition values
+        can't match `filters=` are pruned before they are listed, so only the
+        matching files are fetched.
+
+        For csv with a "pandas" `return_type`, `engine="pyarrow"` is passed to
+        `pd.read_csv`, which then parses with pyarrow's multi-threaded CSV
+        reader while keeping pandas' keyword arguments ("arrow" and "polars"
+        results are always parsed by pyarrow). With `schema_cache=True`, csv
+        is parsed by `pyarrow.csv.read_csv` for every `return_type`, so other
+        keyword arguments must be pyarrow's (`parse_options=`,
+        `convert_options=`...), and the column types inferred from the first
+        file read in a directory are reused for the other files there with
+        the same extension, skipping type inference on later reads. A file
+        that doesn't fit the cached types is read with inference instead.
+        """
+        if return_type not in _RETURN_TYPES:
+            raise ValueError(f"{return_type} is not a valid value for `return_type=`.")
+
+        if input_format is not None and input_format not in _INPUT_FORMATS:
+            raise ValueError(f"{input_format} is not a valid value for `input_format=`.")
+
+        if dataset:
+            if input_format not in ("csv", "parquet", "feather", "orc"):
+                raise ValueError(
+                    f"{input_format} is not a valid value for `input_format=` "
+                    "with `dataset=True`."
+                )
+            root = self._normalize_path(path).rstrip("/")
+            paths = discover_partitioned_files(
+                self._listing_index, root, kwargs.get("filters")
+            )
+            if not paths:
+                raise FileNotFoundError(f"No files under `{path}` match `filters=`.")
+        else:
+            paths = self._expand_paths(path)
+
+            sample = (paths or [path])[0]
+            input_format, compression = self._resolve_format(sample, input_format)
+            if compression is not None and input_format in _ROW_FORMATS:
+                kwargs.setdefault("compression", compression)
+
+        if (
+            input_format == "feather"
+            and not dataset
+            and return_type != "pandas"
+            and self.protocol in _LOCAL_PROTOCOLS
+        ):
+            # Memory-mapped Arrow IPC reads are zero-copy, so cache_data is
+            # skipped: its unpickled results would be private copies in each
+            # session, while mapped pages are shared through the page cache.
+            # Every such read is counted as a miss.
+            start = time.perf_counter()
+            if paths is None:
+                result = self._load_feather(path, return_type, **kwargs)
+            else:
+                parts = [self._load_feather(p, return_type, **kwargs) for p in paths]
+                result = _concat(parts, input_format, return_type)
+            self._stats.record(
+                input_format, time.perf_counter() - start, sizeof(result, deep=False)
+            )
+            return result
+
+        if validate:
+            # The object versions are only passed to make the cache key change
+            # when any of the objects changes. Drop the filesystem's cached
+            # listings first, s3fs and gcsfs answer info() from them.
+            versions = []
+            for p in paths or [path]:
+                self.fs.invalidate_cache(self._normalize_path(p))
+                versions.append(object_version(self.fs.info(p)))
+            kwargs["object_version"] = versions
+
+        if self._write_generations:
+            generations = [
+                self._write_generations.get(self._normalize_path(p), 0)
+                for p in (paths or [path])
+            ]
+            if any(generations):
+                # Likewise, bumped by write() so cached results of overwritten
+                # paths are no longer hit
+                kwargs["write_generation"] = generations
+
+        readers = self._readers.get(ttl)
+        if readers is None:
+            readers = self._readers[ttl] = self._build_readers(ttl)
+
+        if dataset:
+            reader = partial(readers["dataset"], root, paths, input_format)
+        elif paths is not None:
+            reader = partial(
+                readers["many"], paths, input_format, max_workers=max_workers
+            )
+        else:
+            reader = partial(readers["one"], path, input_format)
+
+        self._local.missed_bytes = None
+        start = time.perf_counter()
+        result = reader(return_type, connection_name=self._connection_name, **kwargs)
+        self._stats.record(
+            input_format, time.perf_counter() - start, self._local.missed_bytes
+        )
+        return result
+
+    def _build_readers(self, ttl: Optional[Union[float, int, timedelta]]):
+        """
+        Build the cached readers for `ttl`. They are kept for the lifetime of
+        the connection, so repeated reads skip rebuilding the decorators.
+        """
+        cached = self._cache_decorator(ttl)
+
+        @cached
+        def _read_one(path: str | Path, input_format: str, return_type: str, **kwargs):
+            _pop_cache_key_kwargs(kwargs)
+
+            result = self._load(path, input_format, return_type, **kwargs)
+            return self._record_miss(result)
+
+        @cached
+        def _read_many(
+            paths: List[str],
+            input_format: str,
+            return_type: str,
+            max_workers: Optional[int] = None,
+            **kwargs,
+        ):
+            _pop_cache_key_kwargs(kwargs)
+
+            if input_format == "parquet":
+                # pyarrow reads a list of files as one dataset, fetching and
+                # decoding them on its own thread pool.
+                result = self._load_parquet(paths, return_type, **kwargs)
+                return self._record_miss(result)
+
+            load = lambda p: self._load(p, input_format, return_type, **kwargs)
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                parts = list(pool.map(load, paths))
+            return self._record_miss(_concat(parts, input_format, return_type))
+
+        @cached
+        def _read_dataset(
+            root: str, paths: List[str], input_format: str, return_type: str, **kwargs
+        ):
+            _pop_cache_key_kwargs(kwargs)
+
+            return self._record_miss(
+                self._load_dataset(root, paths, input_format, return_type, **kwargs)
+            )
+
+        return {"one": _read_one, "many": _read_many, "dataset": _read_dataset}
+
+    def _record_miss(self, result):
+        """Note that the current read was a cache miss and how big its result is."""
+        # Shallow, so stats don't cost a pass over every string in the result
+        self._local.missed_bytes = sizeof(result, deep=False)
+        return result
+
+    def cache_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get hit/miss counters for `read()` on this connection, per input format.
+
+        For each format, returns the number of `hits` and `misses`, the
+        average latency in seconds of each (`hit_latency`, `miss_latency`),
+        and the total size in bytes of the results loaded on misses
+        (`bytes`, counting only the pointers of pandas object columns).
+        """
+        return self._stats.snapshot()
+
+    def _cache_decorator(self, ttl: Optional[Union[float, int, timedelta]]):
+        if self._result_cache is not None:
+            return self._result_cache.memoize(ttl=ttl)
+        return cache_data(ttl=ttl, show_spinner="Running `files.read(...)`.")
+
+    def _normalize_path(self, path: str | Path) -> str:
+        return self.fs._strip_protocol(str(path))
+
+    def _expand_paths(self, path: str | Path | List[str | Path]) -> Optional[List[str]]:
+        """
+        Resolve a glob pattern or list of paths to a sorted list of files, or
+        return None if `path` is a single file.
+        """
+        if isinstance(path, (list, tuple)):
+            return [str(p) for p in path]
+        if has_magic(str(path)):
+            # Directories can match too (e.g. "dir.parquet/" for "*.parquet")
+            paths = [
+                p
+                for p in self.glob(str(path))
+                if self.info(p)["type"] != "directory"
+            ]
+            if not paths:
+                raise FileNotFoundError(f"No files match `{path}`.")
+            return paths
+        return None
+
+    def _load(self, path: str | Path, input_format: str, return_type: str, **kwargs):
+        if input_format == "text":
+            return self._load_text(path, **kwargs)
+        elif input_format == "bytes":
+            return self._load_bytes(path, **kwargs)
+        elif input_format == "csv":
+            return self._load_csv(path, return_type, **kwargs)
+        elif input_format == "feather":
+            return self._load_feather(path, return_type, **kwargs)
+        elif input_format == "orc":
+            return self._load_orc(path, return_type, **kwargs)
+        elif input_format == "ndjson":
+            return self._load_ndjson(path, return_type, **kwargs)
+        return self._load_parquet(path, return_type, **kwargs)
 
-        @cache_data(ttl=ttl, show_spinner="Running `files.read(...)`.")
-        def _read_csv(path: str | Path, **kwargs) -> pd.DataFrame:
-            if "connection_name" in kwargs:
-                kwargs.pop("connection_name")
+    def _resolve_format(
+        self, path: str | Path, input_format: Optional[str]
+    ) -> Tuple[str, Optional[str]]:
+        """
+        Get the compression of `path` from its extension, and its input
+        format, inferred if `input_format` is None.
+        """
+        if input_format is None:
+            return self._infer_format(path)
+        return input_format, _infer_from_extension(path)[1]
+
+    def _infer_format(self, path: str | Path) -> Tuple[str, Optional[str]]:
+        """
+        Infer the input format and compression of `path` from its extension,
+        or failing that from its first bytes.
+        """
+        input_format, compression = _infer_from_extension(path)
+        if input_format is not None:
+            return input_format, compression
 
-            with self.open(path, "rt") as f:
+        head = self.fs.cat_file(str(path), start=0, end=8)
+        compression = _sniff_compression(head)
+        if compression is not None:
+            with self.open(path, "rb", compression=compression) as f:
+                head = f.read(8)
+
+        def first_line():
+            with self.open(path, "rb", compression=compression) as f:
+                return f.readline(1 << 16)
+
+        input_format = _sniff_format(head, first_line)
+        if input_format is None:
+            raise ValueError(
+                f"Couldn't infer the format of `{path}`, pass `input_format=`."
+            )
+        return input_format, compression
+
+    def _load_text(
+        self, path: str | Path, byte_range: Optional[ByteRange] = None, **kwargs
+    ) -> str:
+        if byte_range is not None:
+            # A range can start or end inside a multi-byte character
+            data = self._load_bytes(path, byte_range)
+            return data.decode(kwargs.get("encoding") or "utf-8", errors="replace")
+
+        with self.open(path, "rt", **kwargs) as f:
+            return f.read()
+
+    def _load_bytes(
+        self, path: str | Path, byte_range: Optional[ByteRange] = None, **kwargs
+    ) -> bytes:
+        if byte_range is not None:
+            start, end = byte_range
+            return self.fs.cat_file(str(path), start=start, end=end)
+
+        with self.open(path, "rb", **kwargs) as f:
+            return f.read()
+
+    def _load_csv(
+        self,
+        path: str | Path,
+        return_type: str,
+        engine: str = None,
+        compression: Optional[str] = None,
+        schema_cache: bool = False,
+        **kwargs,
+    ):
+        if return_type == "pandas" and not schema_cache:
+            import pandas as pd
+
+            if engine is not None:
+                kwargs["engine"] = engine
+            with self.open(path, "rt", compression=compression) as f:
                 return pd.read_csv(f, **kwargs)
 
-        @cache_data(ttl=ttl, show_spinner="Running `files.read(...)`.")
-        def _read_parquet(path: str | Path, **kwargs) -> pd.DataFrame:
-            if "connection_name" in kwargs:
-                kwargs.pop("connection_name")
+        import pyarrow as pa
+        from pyarrow import csv
+
+        if not schema_cache:
+            with self.open(path, "rb", compression=compression) as f:
+                return _from_arrow(csv.read_csv(f, **kwargs), return_type)
+
+        # Files in the same directory with the same extension are assumed to
+        # share a schema, so only the first one read pays for type inference
+        family = posixpath.join(
+            posixpath.dirname(self._normalize_path(path)),
+            "*" + posixpath.splitext(str(path))[1],
+        )
+        schema = self._csv_schemas.get(family)
+        if schema is not None and "convert_options" not in kwargs:
+            try:
+                with self.open(path, "rb", compression=compression) as f:
+                    table = csv.read_csv(
+                        f,
+                        convert_options=csv.ConvertOptions(column_types=schema),
+                        **kwargs,
+                    )
+                return _from_arrow(table, return_type)
+            except pa.ArrowInvalid:
+                # The file doesn't fit the cached types, infer them again
+                pass
+
+        with self.open(path, "rb", compression=compression) as f:
+            table = csv.read_csv(f, **kwargs)
+        if "convert_options" not in kwargs:
+            self._csv_schemas[family] = table.schema
+        return _from_arrow(table, return_type)
+
+    def _load_parquet(
+        self,
+        path: str | Path | List[str],
+        return_type: str,
+        columns: Optional[List[str]] = None,
+        filters: Optional[List] = None,
+        **kwargs,
+    ):
+        import pyarrow.parquet as pq
+
+        if return_type == "pandas":
+            kwargs.setdefault("use_pandas_metadata", True)
+
+        sources = [str(p) for p in path] if isinstance(path, list) else [str(path)]
+        local_paths = [self._local_path(p) for p in sources]
+        if None not in local_paths:
+            # Memory-map local files instead of going through buffered handles
+            try:
+                table = pq.read_table(
+                    local_paths if isinstance(path, list) else local_paths[0],
+                    columns=columns,
+                    filters=filters,
+                    **{"memory_map": True, **kwargs},
+                )
+                return _from_arrow(table, return_type)
+            except FileNotFoundError:
+                # Disk cache entries can be evicted by another thread or
+                # process after being fetched, read the remote objects then
+                if self.protocol in _LOCAL_PROTOCOLS:
+                    raise
+
+        # Reading through the filesystem instead of a sequential file handle
+        # lets pyarrow skip row groups using the footer statistics and only
+        # request the byte ranges of the selected columns.
+        table = pq.read_table(
+            sources if isinstance(path, list) else sources[0],
+            columns=columns,
+            filters=filters,
+            filesystem=self.fs,
+            **kwargs,
+        )
+        return _from_arrow(table, return_type)
+
+    def _load_dataset(
+        self,
+        root: str,
+        paths: List[str],
+        input_format: str,
+        return_type: str,
+        columns: Optional[List[str]] = None,
+        filters: Optional[List] = None,
+        **kwargs,
+    ):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+
+        file_format = "ipc" if input_format == "feather" else input_format
+        dataset = ds.dataset(
+            paths,
+            filesystem=self.fs,
+            format=file_format,
+            partitioning="hive",
+            partition_base_dir=root,
+        )
+        key_types = partition_key_types(root, paths[0], filters) if paths else {}
+        if any(key_types.values()):
+            # pyarrow reads date partition values as strings, which can't be
+            # compared with the filter's dates
+            fields = []
+            for key, kind in key_types.items():
+                if kind is None:
+                    fields.append(dataset.schema.field(key))
+                elif issubclass(kind, datetime):
+                    fields.append(pa.field(key, pa.timestamp("us")))
+                else:
+                    fields.append(pa.field(key, pa.date32()))
+            dataset = ds.dataset(
+                paths,
+                filesystem=self.fs,
+                format=file_format,
+                partitioning=ds.partitioning(pa.schema(fields), flavor="hive"),
+                partition_base_dir=root,
+            )
+        # Directories were already pruned on partition values, the filter
+        # still applies to the remaining columns and row groups
+        table = dataset.to_table(
+            columns=columns,
+            filter=pq.filters_to_expression(filters) if filters else None,
+            **kwargs,
+        )
+        return _from_arrow(table, return_type)
+
+    def _load_orc(
+        self,
+        path: str | Path,
+        return_type: str,
+        columns: Optional[List[str]] = None,
+        **kwargs,
+    ):
+        from pyarrow import orc
+
+        with self.open(path, "rb") as f:
+            table = orc.read_table(f, columns=columns, **kwargs)
+        return _from_arrow(table, return_type)
+
+    def _load_ndjson(
+        self,
+        path: str | Path,
+        return_type: str,
+        compression: Optional[str] = None,
+        **kwargs,
+    ):
+        from pyarrow import json as arrow_json
+
+        # pyarrow splits the stream into blocks and parses them in parallel
+        with self.open(path, "rb", compression=compression) as f:
+            table = arrow_json.read_json(f, **kwargs)
+        return _from_arrow(table, return_type)
+
+    def _load_feather(
+        self,
+        path: str | Path,
+        return_type: str,
+        columns: Optional[List[str]] = None,
+        **kwargs,
+    ):
+        from pyarrow import feather
+
+        local_path = self._local_path(path)
+        if local_path is not None:
+            # Uncompressed Feather / Arrow IPC files are read zero-copy from
+            # the mapped file
+            try:
+                table = feather.read_table(
+                    local_path, columns=columns, memory_map=True, **kwargs
+                )
+                return _from_arrow(table, return_type)
+            except FileNotFoundError:
+                # Evicted from the disk cache since it was fetched
+                if self.protocol in _LOCAL_PROTOCOLS:
+                    raise
+
+        with self.open(path, "rb") as f:
+            table = feather.read_table(f, columns=columns, **kwargs)
+        return _from_arrow(table, return_type)
+
+    def _local_path(self, path: str | Path) -> Optional[str]:
+        """
+        Return a path on local disk with the contents of `path`: the file
+        itself for local protocols, or its disk cache entry. Returns None if
+        the object is only reachable through the remote filesystem, or too
+        big for the disk cache.
+        """
+        if self.protocol in _LOCAL_PROTOCOLS:
+            return self.fs._strip_protocol(str(path))
+        if self._disk_cache is not None:
+            return self._disk_cache.fetch(self.fs, path)
+        return None
+
+    def _get_async_state(self) -> Tuple[Optional["AsyncFileSystem"], asyncio.Semaphore]:
+        """
+        Return the async filesystem (None if the protocol isn't async-capable)
+        and concurrency semaphore for the running event loop.
+        """
+        loop = asyncio.get_running_loop()
+        state = self._async_state.get(loop)
+        if state is None:
+            from fsspec import filesystem
+
+            afs = None
+            if self.fs.async_impl:
+                # Async filesystems bind their sessions to the loop they were
+                # created on, so each loop gets its own instance
+                afs = filesystem(
+                    self.protocol,
+                    asynchronous=True,
+                    skip_instance_cache=True,
+                    **self._storage_options,
+                )
+            state = (afs, asyncio.Semaphore(self._async_concurrency))
+            self._async_state[loop] = state
+        return state
+
+    @asynccontextmanager
+    async def aopen(
+        self, path: str | Path, mode: str = "rb", **kwargs
+    ) -> AsyncIterator["AbstractAsyncStreamedFile"]:
+        """
+        Async version of `open()` for async-capable filesystems such as s3fs
+        and gcsfs. Not cached.
+
+        Use as `async with conn.aopen(path) as f: data = await f.read()`.
+        """
+        afs, semaphore = self._get_async_state()
+        if afs is None:
+            raise NotImplementedError(
+                f"`aopen()` requires an async filesystem, `{self.protocol}` is not one."
+            )
+
+        async with semaphore:
+            f = await afs.open_async(path, mode, **kwargs)
+            try:
+                yield f
+            finally:
+                await f.close()
+
+    async def aread(
+        self,
+        path: str | Path,
+        input_format: str = None,
+        return_type: ReturnType = "pandas",
+        **kwargs,
+    ):
+        """
+        Async version of `read()` for a single path. Not cached.
+
+        The input format and compression are inferred as by `read()`. On
+        async-capable filesystems the object is fetched on the running event
+        loop, so many `aread()` calls can be overlapped with
+        `asyncio.gather()`. Decompressing and parsing run in a worker thread.
+        Other filesystems run the whole read in a worker thread.
+        """
+        if input_format is not None and input_format not in _INPUT_FORMATS:
+            raise ValueError(f"{input_format} is not a valid value for `input_format=`.")
+        if return_type not in _RETURN_TYPES:
+            raise ValueError(f"{return_type} is not a valid value for `return_type=`.")
+
+        loop = asyncio.get_running_loop()
+        afs, semaphore = self._get_async_state()
+        async with semaphore:
+            if afs is None:
+                load = partial(
+                    self._load_inferred, path, input_format, return_type, **kwargs
+                )
+                return await loop.run_in_executor(None, load)
+            start, end = kwargs.pop("byte_range", None) or (None, None)
+            data = await afs._cat_file(str(path), start=start, end=end)
+
+        return await loop.run_in_executor(
+            None,
+            partial(_parse_fetched, path, data, input_format, return_type, **kwargs),
+        )
+
+    def _load_inferred(
+        self, path: str | Path, input_format: Optional[str], return_type: str, **kwargs
+    ):
+        """`_load()`, inferring the input format and compression like `read()`."""
+        input_format, compression = self._resolve_format(path, input_format)
+        if compression is not None and input_format in _ROW_FORMATS:
+            kwargs.setdefault("compression", compression)
+        return self._load(path, input_format, return_type, **kwargs)
+
+    def read_incremental(
+        self,
+        path: str | Path,
+        input_format: str = None,
+        return_type: ReturnType = "pandas",
+        **kwargs,
+    ):
+        """
+        Read an append-only "text", "csv" or "ndjson" file, fetching only
+        what was appended since the last call.
+
+        The connection remembers the byte offset and version of every path
+        read this way. Each call makes one metadata request and, if the file
+        grew, a single ranged request for the new bytes plus a short overlap
+        used to check that the earlier contents are unchanged. The new
+        complete lines are parsed and appended to the previous result. If the
+        file shrank or was rewritten, it is read again in full. A trailing
+        line without a newline is left for the next call.
+
+        Columns whose type changes in appended lines, e.g. integers followed
+        by a float, are widened, and new columns are filled with nulls for
+        earlier rows. Each call returns its own copy of pandas results.
+        """
+        inferred_format, compression = _infer_from_extension(path)
+        if input_format is None:
+            input_format = inferred_format
+        if input_format not in _ROW_FORMATS:
+            raise ValueError(
+                f"{input_format} is not a valid value for `input_format=` "
+                "with `read_incremental()`."
+            )
+        if compression is not None:
+            raise ValueError("Compressed files can't be read incrementally.")
+        if return_type not in _RETURN_TYPES:
+            raise ValueError(f"{return_type} is not a valid value for `return_type=`.")
+
+        normalized = self._normalize_path(path)
+        key = (normalized, input_format, return_type, repr(sorted(kwargs.items())))
+        # polars results are kept as Arrow tables, which can be concatenated
+        # with type promotion, and converted on return
+        parse_type = "arrow" if return_type == "polars" else return_type
+        with self._tails_lock:
+            lock = self._tail_locks.setdefault(key, threading.Lock())
+
+        with lock:
+            state = self._tails.get(key)
+
+            self.fs.invalidate_cache(normalized)
+            info = self.fs.info(normalized)
+            version, size = object_version(info), info["size"]
+            if state is not None and state.version == version and state.size == size:
+                return _tail_result(state.result, return_type)
+
+            if state is not None and size >= state.offset:
+                overlap = len(state.fingerprint)
+                data = self.fs.cat_file(
+                    normalized, start=state.offset - overlap, end=size
+                )
+                if data[:overlap] == state.fingerprint:
+                    state = self._append_tail(
+                        state, data[overlap:], input_format, parse_type, **kwargs
+                    )
+                    state.version, state.size = version, size
+                    self._tails[key] = state
+                    return _tail_result(state.result, return_type)
+
+            data = self.fs.cat_file(normalized, start=0, end=size)
+            end = data.rfind(b"\n") + 1
+            header = data[: data.find(b"\n") + 1] if input_format == "csv" else b""
+            result = None
+            if end or input_format == "text":
+                result = _parse_bytes(data[:end], input_format, parse_type, **kwargs)
+            state = _TailState(
+                version=version,
+                size=size,
+                offset=end,
+                fingerprint=data[max(end - _TAIL_FINGERPRINT_BYTES, 0) : end],
+                header=header,
+                result=result,
+            )
+            self._tails[key] = state
+            return _tail_result(state.result, return_type)
+
+    def _append_tail(
+        self,
+        state: _TailState,
+        data: bytes,
+        input_format: str,
+        return_type: str,
+        **kwargs,
+    ) -> _TailState:
+        """Parse the complete lines in newly appended `data` into `state`."""
+        end = data.rfind(b"\n") + 1
+        if not end:
+            return state
+
+        new_lines = data[:end]
+        header = state.header
+        if input_format == "csv" and not header:
+            # The header wasn't a complete line yet when the file was first
+            # read, so new_lines starts with it
+            header = new_lines[: new_lines.find(b"\n") + 1]
+            part = _parse_bytes(new_lines, input_format, return_type, **kwargs)
+        elif input_format == "csv":
+            part = _parse_bytes(header + new_lines, input_format, return_type, **kwargs)
+        else:
+            part = _parse_bytes(new_lines, input_format, return_type, **kwargs)
+
+        if state.result is None:
+            result = part
+        elif return_type == "arrow" and input_format != "text":
+            result = _concat_promoting([state.result, part])
+        else:
+            result = _concat([state.result, part], input_format, return_type)
+
+        fingerprint = (state.fingerprint + new_lines)[-_TAIL_FINGERPRINT_BYTES:]
+        return _TailState(
+            version=state.version,
+            size=state.size,
+            offset=state.offset + end,
+            fingerprint=fingerprint,
+            header=header,
+            result=result,
+        )
+
+    def read_iter(
+        self,
+        path: str | Path,
+        input_format: str = "csv",
+        chunksize: int = 100_000,
+        return_type: ReturnType = "pandas",
+        **kwargs,
+    ) -> Iterator:
+        """
+        Read the file at `path` in chunks, straight off the file handle. Not cached.
+
+        Yields strings of up to `chunksize` characters for "text", and chunks
+        of up to `chunksize` rows for "csv" and "parquet" as `return_type`
+        objects ("arrow" yields pyarrow.RecordBatch). Only one chunk is held
+        in memory at a time, so peak memory doesn't depend on the file size.
+        """
+        if return_type not in _RETURN_TYPES:
+            raise ValueError(f"{return_type} is not a valid value for `return_type=`.")
+
+        if input_format == "text":
+            with self.open(path, "rt", **kwargs) as f:
+                while True:
+                    chunk = f.read(chunksize)
+                    if not chunk:
+                        return
+                    yield chunk
+        elif input_format == "csv":
+            if return_type == "pandas":
+                import pandas as pd
+
+                with self.open(path, "rt") as f:
+                    with pd.read_csv(f, chunksize=chunksize, **kwargs) as reader:
+                        yield from reader
+                return
+
+            from pyarrow import csv
 
             with self.open(path, "rb") as f:
-                return pd.read_parquet(f, **kwargs)
-        
-        if input_format == 'text':
-            return _read_text(path, connection_name=self._connection_name, **kwargs)
-        elif input_format == 'csv':
-            return _read_csv(path, connection_name=self._connection_name, **kwargs)
-        elif input_format == 'parquet':
-            return _read_parquet(path, connection_name=self._connection_name, **kwargs)
-        # TODO: if input_format is None, try to infer it from file extension
-        raise ValueError(f"{input_format} is not a valid value for `input_format=`.")
+                for batch in csv.open_csv(f, **kwargs):
+                    for offset in range(0, batch.num_rows, chunksize):
+                        yield _from_arrow(batch.slice(offset, chunksize), return_type)
+        elif input_format == "parquet":
+            import pyarrow.parquet as pq
+
+            with self.open(path, "rb") as f:
+                for batch in pq.ParquetFile(f).iter_batches(batch_size=chunksize, **kwargs):
+                    yield _from_arrow(batch, return_type)
+        else:
+            raise ValueError(f"{input_format} is not a valid value for `input_format=`.")
+
+    def write(
+        self,
+        obj,
+        path: str | Path,
+        output_format: str = None,
+        part_size: Optional[int] = None,
+        **kwargs,
+    ) -> None:
+        """
+        Write `obj` to `path`, serializing it straight into the upload. Not cached.
+
+        `output_format` is one of "text" (a str), "bytes", or "csv",
+        "parquet", "feather" and "orc" for a pandas.DataFrame, pyarrow.Table
+        or polars.DataFrame. Tabular data is written with pyarrow, so pandas
+        indexes are only kept for parquet and feather. If `output_format` is
+        not given, it is inferred from the file extension. Text and csv are
+        compressed when the extension calls for it, e.g. "out.csv.gz".
+
+        On object stores, the output is uploaded in parts of `part_size`
+        bytes as it is produced (a multipart upload for S3), so the whole
+        serialized file is never held in memory. Parts are uploaded one at a
+        time by fsspec's buffered writer, in the calling thread, so
+        serialization pauses while each part uploads: fsspec doesn't expose
+        concurrent part uploads for streamed writes. Cached `read()` results
+        for `path` are invalidated and the cached listings updated once the
+        write completes.
+        """
+        inferred_format, compression = _infer_from_extension(path)
+        if output_format is None:
+            output_format = inferred_format
+        if output_format not in _OUTPUT_FORMATS:
+            raise ValueError(
+                f"{output_format} is not a valid value for `output_format=`."
+            )
+
+        open_kwargs = {} if part_size is None else {"block_size": part_size}
+        if compression is not None and output_format in _ROW_FORMATS:
+            open_kwargs["compression"] = compression
+        if output_format == "text":
+            with self.open(path, "wt", **open_kwargs) as f:
+                f.write(obj)
+        elif output_format == "bytes":
+            with self.open(path, "wb", **open_kwargs) as f:
+                f.write(obj)
+        else:
+            table = _to_arrow(
+                obj, preserve_index=False if output_format == "csv" else None
+            )
+            with self.open(path, "wb", **open_kwargs) as f:
+                if output_format == "csv":
+                    from pyarrow import csv
+
+                    csv.write_csv(table, f, **kwargs)
+                elif output_format == "feather":
+                    from pyarrow import feather
+
+                    feather.write_feather(table, f, **kwargs)
+                elif output_format == "orc":
+                    from pyarrow import orc
+
+                    orc.write_table(table, f, **kwargs)
+                else:
+                    import pyarrow.parquet as pq
+
+                    pq.write_table(table, f, **kwargs)
+
+        key = self._normalize_path(path)
+        self._write_generations[key] = self._write_generations.get(key, 0) + 1
+        self._listing_index.record_write(key)
 
     def _repr_html_(self) -> str:
         module_name = getattr(self, "__module__", None)
@@ -0,0 +1,144 @@
+# Copyright (c) Streamlit Inc. (2018-2022) Snowflake Inc. (2022)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+if TYPE_CHECKING:
+    from fsspec import AbstractFileSystem
+
+
+EVICTION_POLICIES = ("lru", "fifo")
+
+
+def object_version(info: Dict[str, Any]) -> str:
+    """
+    Return a string identifying the current version of a remote object, built
+    from the metadata returned by `fs.info()`.
+
+    Prefers the ETag (S3, HTTP) or generation (GCS), and falls back to the
+    modification time and size for filesystems that expose neither.
+    """
+    for key in ("ETag", "etag", "generation", "md5Hash"):
+        if info.get(key):
+            return str(info[key]).strip('"')
+    mtime = (
+        info.get("mtime")
+        or info.get("LastModified")
+        or info.get("updated")
+        or info.get("last_modified")
+    )
+    return f"{mtime}-{info.get('size')}"
+
+
+class DiskCache:
+    """
+    Local on-disk cache of raw object bytes, keyed by path and object version.
+
+    Entries are plain files in `directory`, so they survive process restarts
+    and can be shared by several replicas on the same host. When
+    `max_bytes` is set, the oldest entries other than the one just inserted
+    are evicted after each insert: by last access for "lru", or by insertion
+    time for "fifo". Objects bigger than `max_bytes` aren't cached.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: Optional[int] = None,
+        eviction: str = "lru",
+    ) -> None:
+        if eviction not in EVICTION_POLICIES:
+            raise ValueError(
+                f"{eviction} is not a valid value for `disk_cache_eviction=`."
+            )
+        self.directory = os.path.expanduser(directory)
+        self.max_bytes = max_bytes
+        self.eviction = eviction
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _key(self, protocol: str, path: str, version: str) -> str:
+        raw = f"{protocol}\0{path}\0{version}".encode()
+        return hashlib.sha256(raw).hexdigest()
+
+    def fetch(self, fs: "AbstractFileSystem", path: str) -> Optional[str]:
+        """
+        Return the local path of a cached copy of `path`, downloading it first
+        if the current version of the object isn't cached yet, or None if the
+        object is too big to cache.
+
+        Another thread or process may evict the entry before it's opened, so
+        callers should fall back to the remote object on FileNotFoundError.
+        """
+        path = fs._strip_protocol(str(path))
+        # info() may be answered from the filesystem's listing cache, which
+        # doesn't see objects overwritten by other writers
+        fs.invalidate_cache(path)
+        info = fs.info(path)
+        if self.max_bytes is not None and (info.get("size") or 0) > self.max_bytes:
+            return None
+        version = object_version(info)
+        protocol = fs.protocol if isinstance(fs.protocol, str) else fs.protocol[0]
+        local = os.path.join(self.directory, self._key(protocol, path, version))
+
+        if os.path.exists(local):
+            if self.eviction == "lru":
+                os.utime(local)
+            return local
+
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".partial")
+        os.close(fd)
+        try:
+            fs.get_file(path, tmp)
+            os.replace(tmp, local)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+        self._evict(keep=local)
+        return local
+
+    def _evict(self, keep: str) -> None:
+        if self.max_bytes is None:
+            return
+
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if not entry.is_file() or entry.name.endswith(".partial"):
+                continue
+            stat = entry.stat()
+            total += stat.st_size
+            if entry.path != keep:
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Evicted concurrently by another process
+                pass
+            total -= size
+
+    def clear(self) -> None:
+        """Remove every cached object."""
+        for entry in os.scandir(self.directory):
+            if entry.is_file():
+                os.remove(entry.path)
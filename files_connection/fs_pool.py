@@ -0,0 +1,103 @@
+# Copyright (c) Streamlit Inc. (2018-2022) Snowflake Inc. (2022)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    from fsspec import AbstractFileSystem
+
+
+class FilesystemPool:
+    """
+    Process-wide registry of async fsspec filesystems (s3fs, gcsfs, ...),
+    shared by every connection with the same protocol and storage options
+    (including credentials).
+
+    fsspec's instance cache already shares these across threads; on top of
+    it the pool drops filesystems not requested for `idle_timeout` seconds,
+    so the next connection creates a fresh one with new sessions, and lets
+    `pool_size` be set per set of options. Sync filesystems (sftp, ftp, smb,
+    ...) aren't thread-safe, so they're left to fsspec's per-thread cache
+    instead of being shared by every session.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, Tuple["AbstractFileSystem", float]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(protocol: str, storage_options: Dict[str, Any]) -> str:
+        raw = json.dumps([protocol, storage_options], sort_keys=True, default=repr)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(
+        self,
+        protocol: str,
+        storage_options: Dict[str, Any],
+        idle_timeout: Optional[float] = None,
+    ) -> "AbstractFileSystem":
+        from fsspec import filesystem, get_filesystem_class
+
+        if not get_filesystem_class(protocol).async_impl:
+            return filesystem(protocol, **storage_options)
+
+        key = self._key(protocol, storage_options)
+        now = time.monotonic()
+        with self._lock:
+            if idle_timeout is not None:
+                self._entries = {
+                    k: (fs, used)
+                    for k, (fs, used) in self._entries.items()
+                    if now - used <= idle_timeout
+                }
+
+            entry = self._entries.get(key)
+            if entry is None:
+                fs = filesystem(protocol, skip_instance_cache=True, **storage_options)
+            else:
+                fs = entry[0]
+            self._entries[key] = (fs, now)
+            return fs
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def with_pool_size(
+    protocol: str, storage_options: Dict[str, Any], pool_size: Optional[int]
+) -> Dict[str, Any]:
+    """
+    Return `storage_options` with the HTTP connection pool size set, for the
+    drivers that expose it.
+    """
+    if pool_size is None:
+        return storage_options
+
+    options = copy.deepcopy(storage_options)
+    if protocol in ("s3", "s3a"):
+        options.setdefault("config_kwargs", {}).setdefault(
+            "max_pool_connections", pool_size
+        )
+    return options
+
+
+pool = FilesystemPool()
@@ -0,0 +1,182 @@
+# Copyright (c) Streamlit Inc. (2018-2022) Snowflake Inc. (2022)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import posixpath
+import threading
+import time
+from fnmatch import fnmatchcase
+from glob import has_magic
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from fsspec import AbstractFileSystem
+
+
+Info = Dict[str, Any]
+
+
+def _match_segments(names: List[str], patterns: List[str]) -> bool:
+    """Match path segments against glob segments, `**` spanning any number."""
+    if not patterns:
+        return not names
+    if patterns[0] == "**":
+        return _match_segments(names, patterns[1:]) or (
+            bool(names) and _match_segments(names[1:], patterns)
+        )
+    return (
+        bool(names)
+        and fnmatchcase(names[0], patterns[0])
+        and _match_segments(names[1:], patterns[1:])
+    )
+
+
+class ListingIndex:
+    """
+    In-memory index of directory listings for a filesystem.
+
+    Every directory (prefix) listing is cached on its own with a `ttl` in
+    seconds, so refreshing only re-lists the prefixes that expired rather
+    than the whole tree. `find()` and `glob()` are answered by walking the
+    cached listings, and `record_write()` updates the index in place after a
+    write made through the connection.
+    """
+
+    def __init__(self, fs: "AbstractFileSystem", ttl: Optional[float] = 60) -> None:
+        self._fs = fs
+        self.ttl = ttl
+        self._listings: Dict[str, Tuple[float, Dict[str, Info]]] = {}
+        self._lock = threading.Lock()
+
+    def _normalize(self, path: str) -> str:
+        return self._fs._strip_protocol(str(path)).rstrip("/")
+
+    def _is_fresh(self, listed_at: float) -> bool:
+        return self.ttl is None or time.monotonic() - listed_at < self.ttl
+
+    def _listing(self, path: str, refresh: bool = False) -> Dict[str, Info]:
+        path = self._normalize(path)
+        with self._lock:
+            cached = self._listings.get(path)
+        if cached is not None and not refresh and self._is_fresh(cached[0]):
+            return cached[1]
+
+        # The filesystem may keep its own listings cache (e.g. s3fs), which
+        # would otherwise hand back the stale listing
+        self._fs.invalidate_cache(path)
+        entries = {
+            info["name"].rstrip("/"): info
+            for info in self._fs.ls(path, detail=True)
+        }
+        with self._lock:
+            self._listings[path] = (time.monotonic(), entries)
+        return entries
+
+    def ls(
+        self, path: str, detail: bool = False, refresh: bool = False
+    ) -> List[str] | List[Info]:
+        entries = self._listing(path, refresh=refresh)
+        if detail:
+            return list(entries.values())
+        return sorted(entries)
+
+    def info(self, path: str, refresh: bool = False) -> Info:
+        path = self._normalize(path)
+        parent = posixpath.dirname(path)
+        with self._lock:
+            cached = self._listings.get(parent)
+        if cached is not None and not refresh and self._is_fresh(cached[0]):
+            if path in cached[1]:
+                return cached[1][path]
+        return self._fs.info(path)
+
+    def find(
+        self,
+        path: str,
+        maxdepth: Optional[int] = None,
+        withdirs: bool = False,
+        detail: bool = False,
+        refresh: bool = False,
+    ) -> List[str] | Dict[str, Info]:
+        found: Dict[str, Info] = {}
+        pending = [(self._normalize(path), 1)]
+        while pending:
+            prefix, depth = pending.pop()
+            for name, info in self._listing(prefix, refresh=refresh).items():
+                if info["type"] == "directory":
+                    if withdirs:
+                        found[name] = info
+                    if maxdepth is None or depth < maxdepth:
+                        pending.append((name, depth + 1))
+                else:
+                    found[name] = info
+
+        if detail:
+            return dict(sorted(found.items()))
+        return sorted(found)
+
+    def glob(self, pattern: str, refresh: bool = False) -> List[str]:
+        """
+        Find the files and directories matching `pattern`, where `*` matches
+        within one path segment and a `**` segment matches zero or more
+        segments. Pass `refresh=True` to list the searched directories again.
+        """
+        pattern = self._normalize(pattern)
+        parts = pattern.split("/")
+        static = []
+        for part in parts:
+            if has_magic(part):
+                break
+            static.append(part)
+        root = "/".join(static)
+
+        if len(static) == len(parts):
+            try:
+                self.info(root, refresh=refresh)
+            except FileNotFoundError:
+                return []
+            return [root]
+
+        maxdepth = None if "**" in parts else len(parts) - len(static)
+        candidates = self.find(root, maxdepth=maxdepth, withdirs=True, refresh=refresh)
+        return [
+            name for name in candidates if _match_segments(name.split("/"), parts)
+        ]
+
+    def record_write(self, path: str) -> None:
+        """Add or update `path` in the cached listings after writing to it."""
+        path = self._normalize(path)
+        self._fs.invalidate_cache(path)
+        info = dict(self._fs.info(path), name=path)
+
+        with self._lock:
+            child = path
+            entry = info
+            while True:
+                parent = posixpath.dirname(child)
+                cached = self._listings.get(parent)
+                if cached is not None and (child == path or child not in cached[1]):
+                    # Listings may be being iterated elsewhere, so replace
+                    # rather than mutate them
+                    listed_at, entries = cached
+                    self._listings[parent] = (listed_at, {**entries, child: entry})
+                if not parent or parent == child:
+                    break
+                child = parent
+                entry = {"name": child, "size": 0, "type": "directory"}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._listings.clear()
@@ -0,0 +1,142 @@
+# Copyright (c) Streamlit Inc. (2018-2022) Snowflake Inc. (2022)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import datetime
+import operator
+import posixpath
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from urllib.parse import unquote
+
+if TYPE_CHECKING:
+    from files_connection.listing import ListingIndex
+
+
+_OPERATORS = {
+    "=": operator.eq,
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    ">": operator.gt,
+    "<=": operator.le,
+    ">=": operator.ge,
+    "in": lambda value, options: value in options,
+    "not in": lambda value, options: value not in options,
+}
+
+
+def _to_dnf(filters: Optional[List]) -> List[List[tuple]]:
+    """Normalize pyarrow-style filters to a list of AND-ed conjunctions."""
+    if not filters:
+        return []
+    if isinstance(filters[0], tuple):
+        return [filters]
+    return [list(conjunction) for conjunction in filters]
+
+
+def _coerce(raw: str, like: Any) -> Any:
+    """
+    Cast a partition value parsed from a path to the type of a filter value.
+    Raises TypeError or ValueError if it can't be.
+    """
+    if isinstance(like, (list, tuple, set)):
+        like = next(iter(like), raw)
+    if isinstance(like, bool):
+        return raw == "true"
+    if isinstance(like, datetime.date):
+        # date or datetime
+        return type(like).fromisoformat(raw)
+    return type(like)(raw)
+
+
+def _may_match(partitions: Dict[str, str], dnf: List[List[tuple]]) -> bool:
+    """
+    Return False if the partition values seen so far rule out every
+    conjunction in `dnf`. Predicates on other columns are assumed to match.
+    """
+    if not dnf:
+        return True
+
+    for conjunction in dnf:
+        for column, op, value in conjunction:
+            if column not in partitions:
+                continue
+            compare = _OPERATORS.get(op)
+            if compare is None:
+                raise ValueError(f"{op} is not a supported filter operator.")
+            try:
+                matches = compare(_coerce(partitions[column], value), value)
+            except (TypeError, ValueError):
+                # Can't compare the directory's value with the filter's, so
+                # it may match
+                continue
+            if not matches:
+                break
+        else:
+            return True
+    return False
+
+
+def partition_key_types(
+    root: str, path: str, filters: Optional[List]
+) -> Dict[str, Optional[type]]:
+    """
+    Get the partition keys in `path`, in order, each mapped to the type of
+    the date or datetime `filters` compare it with, or None.
+    """
+    types: Dict[str, Optional[type]] = {
+        segment.partition("=")[0]: None
+        for segment in posixpath.relpath(posixpath.dirname(path), root).split("/")
+        if "=" in segment
+    }
+    for conjunction in _to_dnf(filters):
+        for column, _, value in conjunction:
+            if isinstance(value, (list, tuple, set)):
+                value = next(iter(value), None)
+            if column in types and isinstance(value, datetime.date):
+                types[column] = type(value)
+    return types
+
+
+def discover_partitioned_files(
+    index: "ListingIndex", root: str, filters: Optional[List] = None
+) -> List[str]:
+    """
+    List the files of a Hive-partitioned dataset (`key=value/` directories)
+    under `root`, skipping directories whose partition values can't match
+    `filters` without listing them.
+    """
+    dnf = _to_dnf(filters)
+    files = []
+    pending = [(root, {})]
+    while pending:
+        prefix, partitions = pending.pop()
+        for info in index.ls(prefix, detail=True):
+            name = info["name"].rstrip("/")
+            basename = posixpath.basename(name)
+            if basename.startswith((".", "_")):
+                # Hidden and metadata files such as _SUCCESS or _common_metadata
+                continue
+            if info["type"] != "directory":
+                files.append(name)
+                continue
+            key, sep, value = basename.partition("=")
+            if not sep:
+                pending.append((name, partitions))
+                continue
+            child_partitions = {**partitions, key: unquote(value)}
+            if _may_match(child_partitions, dnf):
+                pending.append((name, child_partitions))
+    return sorted(files)
@@ -0,0 +1,174 @@
+# Copyright (c) Streamlit Inc. (2018-2022) Snowflake Inc. (2022)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import pickle
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Callable, Dict, Optional, Union
+
+EVICTION_POLICIES = ("lru", "lfu", "cost")
+
+
+def sizeof(value: Any, deep: bool = True) -> int:
+    """
+    Estimate the memory held by a cached result, in bytes. With `deep=False`,
+    pandas object columns only count their pointers, which skips a pass over
+    every value.
+    """
+    if hasattr(value, "memory_usage"):
+        # pandas.DataFrame / Series
+        usage = value.memory_usage(deep=deep)
+        return int(usage.sum() if hasattr(usage, "sum") else usage)
+    if hasattr(value, "nbytes"):
+        # pyarrow.Table / RecordBatch, numpy arrays
+        return int(value.nbytes)
+    if hasattr(value, "estimated_size"):
+        # polars.DataFrame
+        return int(value.estimated_size())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(sizeof(item, deep) for item in value)
+    return sys.getsizeof(value)
+
+
+def _copy(value: Any) -> Any:
+    """
+    Copy pandas and polars results, so callers mutating the returned value
+    don't change the cached one. pyarrow Tables, str and bytes are immutable.
+    """
+    if hasattr(value, "memory_usage") and hasattr(value, "copy"):
+        # pandas.DataFrame / Series
+        return value.copy()
+    if hasattr(value, "estimated_size") and hasattr(value, "clone"):
+        # polars.DataFrame
+        return value.clone()
+    return value
+
+
+@dataclass
+class _Entry:
+    value: Any
+    size: int
+    cost: float
+    expires_at: Optional[float]
+    hits: int = 0
+    last_access: float = field(default_factory=time.monotonic)
+
+
+class ResultCache:
+    """
+    In-memory cache for read results, bounded by the total size of the
+    cached values rather than by their number.
+
+    Each entry is accounted at its estimated size in bytes. When adding an
+    entry takes the cache over `max_bytes`, entries are evicted until it
+    fits, choosing the least recently used ("lru"), the least frequently used
+    ("lfu"), or the lowest `hits * recompute time / size` ("cost", so that
+    large results that are cheap to recompute go first). Results bigger than
+    the whole budget are returned without being cached.
+
+    Like `st.cache_data`, `memoize()` gives every caller its own copy of
+    pandas and polars results. Unlike it, nothing is pickled, so other mutable
+    values are shared between callers and shouldn't be mutated in place.
+    """
+
+    def __init__(self, max_bytes: int, eviction: str = "lru") -> None:
+        if eviction not in EVICTION_POLICIES:
+            raise ValueError(f"{eviction} is not a valid value for `cache_eviction=`.")
+        self.max_bytes = max_bytes
+        self.eviction = eviction
+        self.total_bytes = 0
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _make_key(func: Callable, args: tuple, kwargs: dict) -> str:
+        try:
+            raw = pickle.dumps((args, sorted(kwargs.items())))
+        except (pickle.PicklingError, TypeError, AttributeError):
+            raw = repr((args, sorted(kwargs.items()))).encode()
+        return hashlib.sha256(func.__qualname__.encode() + b"\0" + raw).hexdigest()
+
+    def _score(self, entry: _Entry) -> float:
+        if self.eviction == "lru":
+            return entry.last_access
+        if self.eviction == "lfu":
+            return entry.hits
+        return (entry.hits + 1) * entry.cost / max(entry.size, 1)
+
+    def _evict(self) -> None:
+        while self.total_bytes > self.max_bytes and self._entries:
+            key = min(self._entries, key=lambda k: self._score(self._entries[k]))
+            self.total_bytes -= self._entries.pop(key).size
+
+    def get(self, key: str) -> Any:
+        """Return the cached value for `key`, raising KeyError on a miss."""
+        with self._lock:
+            entry = self._entries[key]
+            if entry.expires_at is not None and time.monotonic() >= entry.expires_at:
+                self.total_bytes -= self._entries.pop(key).size
+                raise KeyError(key)
+            entry.hits += 1
+            entry.last_access = time.monotonic()
+            return entry.value
+
+    def put(self, key: str, value: Any, cost: float, ttl: Optional[float]) -> None:
+        size = sizeof(value)
+        if size > self.max_bytes:
+            return
+
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= previous.size
+            self._entries[key] = _Entry(value, size, cost, expires_at)
+            self.total_bytes += size
+            self._evict()
+
+    def memoize(
+        self, ttl: Optional[Union[float, int, timedelta]] = None
+    ) -> Callable[[Callable], Callable]:
+        """Decorator caching a function's results, like `st.cache_data(ttl=...)`."""
+        if isinstance(ttl, timedelta):
+            ttl = ttl.total_seconds()
+
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                key = self._make_key(func, args, kwargs)
+                try:
+                    return _copy(self.get(key))
+                except KeyError:
+                    pass
+
+                start = time.perf_counter()
+                value = func(*args, **kwargs)
+                self.put(key, value, time.perf_counter() - start, ttl)
+                return _copy(value)
+
+            return wrapper
+
+        return decorator
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
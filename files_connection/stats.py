@@ -0,0 +1,66 @@
+# Copyright (c) Streamlit Inc. (2018-2022) Snowflake Inc. (2022)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import threading
+from collections import defaultdict
+from typing import Dict, Optional
+
+
+class ReadStats:
+    """Thread-safe hit/miss, latency and size counters, keyed by input format."""
+
+    def __init__(self) -> None:
+        self._counters: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: {
+                "hits": 0,
+                "misses": 0,
+                "hit_seconds": 0.0,
+                "miss_seconds": 0.0,
+                "bytes": 0,
+            }
+        )
+        self._lock = threading.Lock()
+
+    def record(self, key: str, seconds: float, missed_bytes: Optional[int]) -> None:
+        """Record one read, a miss if `missed_bytes` is not None."""
+        with self._lock:
+            counters = self._counters[key]
+            if missed_bytes is None:
+                counters["hits"] += 1
+                counters["hit_seconds"] += seconds
+            else:
+                counters["misses"] += 1
+                counters["miss_seconds"] += seconds
+                counters["bytes"] += missed_bytes
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                key: {
+                    "hits": c["hits"],
+                    "misses": c["misses"],
+                    "hit_latency": c["hit_seconds"] / c["hits"] if c["hits"] else 0.0,
+                    "miss_latency": (
+                        c["miss_seconds"] / c["misses"] if c["misses"] else 0.0
+                    ),
+                    "bytes": c["bytes"],
+                }
+                for key, c in self._counters.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
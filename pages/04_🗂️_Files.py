@@ -17,8 +17,16 @@ st.markdown("""
 data source like S3, GCS, HDFS, sftp, etc. It has the following core methods:
 - `open(path, mode = 'rb')`: Get a file handle for file at the given path. Not cached.
 - `read(path, input_format)`: Read the file at `path` and return a pandas.DataFrame. Cached by default.
-  - Currently accepted input formats are `csv`, `parquet`, and `text` (text returns a string instead of a DF)
-- `fs` property to get the underlying fsspec AbstractFileSystem for additional commands, e.g. `conn.fs.ls('.')`
+  - Currently accepted input formats are `csv`, `parquet`, `feather`, `orc`, `ndjson`, `text` and `bytes` (text and bytes return a string / bytes instead of a DF)
+  - If `input_format` is omitted, it's inferred from the file extension; compressed files like `events.jsonl.zst` are decompressed on the fly
+  - For `text` and `bytes`, `byte_range=(start, end)` reads only part of the file
+  - Pass `return_type='arrow'` or `return_type='polars'` to get a pyarrow.Table or polars.DataFrame read directly with pyarrow
+- `read_iter(path, input_format, chunksize)`: Iterate over a large file in bounded-memory chunks. Not cached.
+- `read_incremental(path, input_format)`: Read an append-only log, CSV or NDJSON file, fetching only the bytes appended since the last call.
+- `write(obj, path, output_format)`: Write a string, bytes or DataFrame to `path`, streaming it into the upload. Invalidates cached reads of `path`.
+- `ls(path)`, `find(path)`, `glob(pattern)` and `info(path)`: Listing operations backed by a cached directory index, e.g. `conn.ls('.')`
+- `cache_stats()`: Per-format hit / miss counts, latencies and bytes loaded by `read()`
+- `fs` property to get the underlying fsspec AbstractFileSystem for additional commands, e.g. `conn.fs.mkdir('new-dir')`
 
 See working examples below for local files, AWS S3, and Google GCS.
 
@@ -51,7 +59,7 @@ with local:
             csv_file = "test-files/test.csv"
             parquet_file = "test-files/test.parquet"
             try:
-                _ = conn.fs.ls("./test-files/")
+                _ = conn.ls("./test-files/")
             except FileNotFoundError:
                 conn.fs.mkdir("./test-files/")
             try:
@@ -63,14 +71,12 @@ with local:
             try:
                 _ = conn.read(csv_file, input_format='csv')
             except FileNotFoundError:
-                with conn.open(csv_file, "wt") as f:
-                    df.to_csv(f, index=False)
+                conn.write(df, csv_file, output_format="csv")
             
             try:
                 _ = conn.read(parquet_file, input_format='parquet')
             except FileNotFoundError:
-                with conn.open(parquet_file, "wb") as f:
-                    df.to_parquet(f)
+                conn.write(df, parquet_file, output_format="parquet")
 
 
     st.write("#### Text files")
@@ -120,14 +126,12 @@ secret = "..."
             try:
                 _ = conn.read(csv_file, input_format='csv')
             except FileNotFoundError:
-                with conn.open(csv_file, "wt") as f:
-                    df.to_csv(f, index=False)
+                conn.write(df, csv_file, output_format="csv")
             
             try:
                 _ = conn.read(parquet_file, input_format='parquet')
             except FileNotFoundError:
-                with conn.open(parquet_file, "wb") as f:
-                    df.to_parquet(f)
+                conn.write(df, parquet_file, output_format="parquet")
 
     st.write("#### Text files")
 
@@ -144,7 +148,7 @@ secret = "..."
     
     st.write("#### List operations")
     with st.echo():
-        st.write(conn.fs.ls("st-connection-test/"))
+        st.write(conn.ls("st-connection-test/"))
 
 with s3_other:
     st.write("## Working with S3 files")
@@ -178,14 +182,12 @@ with s3_other:
             try:
                 _ = conn.read(csv_file, input_format='csv')
             except FileNotFoundError:
-                with conn.open(csv_file, "wt") as f:
-                    df.to_csv(f, index=False)
+                conn.write(df, csv_file, output_format="csv")
             
             try:
                 _ = conn.read(parquet_file, input_format='parquet')
             except FileNotFoundError:
-                with conn.open(parquet_file, "wb") as f:
-                    df.to_parquet(f)
+                conn.write(df, parquet_file, output_format="parquet")
 
     st.write("#### Text files")
     with st.echo():
@@ -201,7 +203,7 @@ with s3_other:
     
     st.write("#### List operations")
     with st.echo():
-        st.write(conn.fs.ls("st-connection-test/"))
+        st.write(conn.ls("st-connection-test/"))
 
 
 with gcs:
@@ -245,14 +247,12 @@ client_x509_cert_url = "..."
             try:
                 _ = conn.read(csv_file, input_format='csv')
             except FileNotFoundError:
-                with conn.open(csv_file, "wt") as f:
-                    df.to_csv(f, index=False)
+                conn.write(df, csv_file, output_format="csv")
             
             try:
                 _ = conn.read(parquet_file, input_format='parquet')
             except FileNotFoundError:
-                with conn.open(parquet_file, "wb") as f:
-                    df.to_parquet(f)
+                conn.write(df, parquet_file, output_format="parquet")
 
     st.write("#### Text files")
 
@@ -269,7 +269,7 @@ client_x509_cert_url = "..."
     
     st.write("#### List operations")
     with st.echo():
-        st.write(conn.fs.ls("st-connection-test/"))
+        st.write(conn.ls("st-connection-test/"))
 
 with gcs_other:
     "## Working with Google Cloud Storage files"
@@ -306,14 +306,12 @@ with gcs_other:
                 try:
                     _ = conn.read(csv_file, input_format='csv')
                 except FileNotFoundError:
-                    with conn.open(csv_file, "wt") as f:
-                        df.to_csv(f, index=False)
+                    conn.write(df, csv_file, output_format="csv")
                 
                 try:
                     _ = conn.read(parquet_file, input_format='parquet')
                 except FileNotFoundError:
-                    with conn.open(parquet_file, "wb") as f:
-                        df.to_parquet(f)
+                    conn.write(df, parquet_file, output_format="parquet")
 
         st.write("#### Text files")
 
@@ -330,4 +328,4 @@ with gcs_other:
         
         st.write("#### List operations")
         with st.echo():
-            st.write(conn.fs.ls("st-connection-test/"))
\ No newline at end of file
+            st.write(conn.ls("st-connection-test/"))
\ No newline at end of file
@@ -0,0 +1,182 @@
+import pytest
+
+pytest.importorskip("duckdb")
+
+from duckdb_connection import DuckDBConnection
+
+
+@pytest.fixture
+def conn():
+    # cache_max_bytes, since st.cache_data doesn't cache without a runtime
+    conn = DuckDBConnection("test", database=":memory:", cache_max_bytes=2**26)
+    with conn.checkout() as cursor:
+        cursor.execute("CREATE TABLE items(item VARCHAR, value INTEGER)")
+        cursor.execute("CREATE TABLE other(item VARCHAR, value INTEGER)")
+        cursor.execute("INSERT INTO items VALUES ('jeans', 20), ('hammer', 42)")
+    return conn
+
+
+def _items(conn, **kwargs):
+    return sorted(conn.query("SELECT item FROM items", **kwargs)["item"])
+
+
+def test_query_params(conn):
+    query = "SELECT item FROM items WHERE value > ?"
+    assert list(conn.query(query, params=[30])["item"]) == ["hammer"]
+    assert sorted(conn.query(query, params=[10])["item"]) == ["hammer", "jeans"]
+    named = conn.query("SELECT item FROM items WHERE value < $limit", params={"limit": 30})
+    assert list(named["item"]) == ["jeans"]
+
+
+def test_insert_with_params_invalidates(conn):
+    assert _items(conn) == ["hammer", "jeans"]
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO items VALUES (?, ?)", ["laptop", 2000])
+    cursor.close()
+    assert _items(conn) == ["hammer", "jeans", "laptop"]
+
+
+def test_params_query_invalidated_by_write(conn):
+    query = "SELECT item FROM items WHERE value > ?"
+    assert list(conn.query(query, params=[30])["item"]) == ["hammer"]
+    with conn.checkout() as cursor:
+        cursor.execute("INSERT INTO items VALUES ('laptop', 2000)")
+    assert sorted(conn.query(query, params=[30])["item"]) == ["hammer", "laptop"]
+
+
+def test_update_and_delete_invalidate(conn):
+    assert _items(conn) == ["hammer", "jeans"]
+    with conn.checkout() as cursor:
+        cursor.execute("UPDATE items SET item = 'shirt' WHERE item = ?", ["jeans"])
+    assert _items(conn) == ["hammer", "shirt"]
+    with conn.checkout() as cursor:
+        cursor.execute("DELETE FROM items WHERE value > ?", [30])
+    assert _items(conn) == ["shirt"]
+
+
+def test_insert_select_invalidates_target(conn):
+    assert _items(conn) == ["hammer", "jeans"]
+    with conn.checkout() as cursor:
+        cursor.execute("INSERT INTO other VALUES ('laptop', 2000)")
+        cursor.execute("INSERT INTO items SELECT * FROM other")
+    assert _items(conn) == ["hammer", "jeans", "laptop"]
+
+
+def test_write_to_other_table_keeps_cached_result(conn):
+    assert _items(conn) == ["hammer", "jeans"]
+    # Not made through the connection's cursors, so not tracked
+    conn._instance.execute("INSERT INTO items VALUES ('laptop', 2000)")
+    with conn.checkout() as cursor:
+        cursor.execute("INSERT INTO other VALUES ('drill', 80)")
+    assert _items(conn) == ["hammer", "jeans"]
+
+
+def test_view_invalidated_by_write_to_base_table(conn):
+    with conn.checkout() as cursor:
+        cursor.execute("CREATE VIEW expensive AS SELECT * FROM items WHERE value > 30")
+    assert list(conn.query("SELECT item FROM expensive")["item"]) == ["hammer"]
+    with conn.checkout() as cursor:
+        cursor.execute("INSERT INTO items VALUES ('laptop', 2000)")
+    assert sorted(conn.query("SELECT item FROM expensive")["item"]) == ["hammer", "laptop"]
+
+
+def test_checkout_doesnt_leak_open_transaction():
+    conn = DuckDBConnection("pool", database=":memory:", max_cursors=1)
+    with conn.checkout() as cursor:
+        cursor.execute("CREATE TABLE items(item VARCHAR)")
+    with conn.checkout() as cursor:
+        cursor.execute("BEGIN")
+        cursor.execute("INSERT INTO items VALUES ('jeans')")
+    with conn.checkout() as cursor:
+        assert cursor.execute("SELECT count(*) FROM items").fetchone() == (0,)
+    assert conn.pool_stats()["created"] == 1
+
+
+def test_register_filesystem(conn):
+    pd = pytest.importorskip("pandas")
+    from files_connection import FilesConnection
+
+    files = FilesConnection("duckdb-files", protocol="memory")
+    files.write(pd.DataFrame({"x": [1, 2, 3]}), "/duckdb/data.parquet", output_format="parquet")
+    conn.register_filesystem(files)
+    # Registering again replaces the filesystem instead of failing
+    conn.register_filesystem(files)
+    query = "SELECT sum(x) AS total FROM read_parquet('memory:///duckdb/data.parquet')"
+    assert conn.query(query)["total"][0] == 6
+    # and is registered again on the new duckdb connection
+    conn.reset()
+    query = "SELECT count(*) AS n FROM read_parquet('memory:///duckdb/data.parquet')"
+    assert conn.query(query)["n"][0] == 3
+
+
+def test_query_arrow_result_is_reusable(conn):
+    pa = pytest.importorskip("pyarrow")
+
+    for _ in range(2):
+        # The second call is served from the cache
+        table = conn.query("SELECT item FROM items ORDER BY item", return_type="arrow")
+        assert isinstance(table, pa.Table)
+        assert table.column("item").to_pylist() == ["hammer", "jeans"]
+
+
+def test_result_cache_returns_copies(conn):
+    df = conn.query("SELECT item FROM items ORDER BY item")
+    df["item"] = "changed"
+    assert list(conn.query("SELECT item FROM items ORDER BY item")["item"]) == ["hammer", "jeans"]
+
+
+def test_query_inside_checkout_doesnt_deadlock():
+    conn = DuckDBConnection("nested", database=":memory:", max_cursors=1, cache_max_bytes=2**20)
+    with conn.checkout() as cursor:
+        cursor.execute("CREATE TABLE items(item VARCHAR)")
+        assert len(conn.query("SELECT * FROM items")) == 0
+
+
+def test_checkout_wait_times_out():
+    import threading
+
+    conn = DuckDBConnection("timeout", database=":memory:", max_cursors=1, cursor_wait_timeout=0.1)
+    errors = []
+
+    def other_session():
+        try:
+            with conn.checkout():
+                pass
+        except TimeoutError as e:
+            errors.append(e)
+
+    with conn.checkout():
+        thread = threading.Thread(target=other_session)
+        thread.start()
+        thread.join(5)
+    assert len(errors) == 1
+    assert conn.pool_stats()["in_use"] == 0
+
+
+def test_checkout_rolls_back_aborted_transaction():
+    conn = DuckDBConnection("aborted", database=":memory:", max_cursors=1)
+    with conn.checkout() as cursor:
+        cursor.execute("CREATE TABLE items(value DOUBLE)")
+    with conn.checkout() as cursor:
+        cursor.execute("BEGIN")
+        cursor.execute("INSERT INTO items VALUES (1)")
+        with pytest.raises(Exception):
+            cursor.execute("INSERT INTO items VALUES ('a')")
+    with conn.checkout() as cursor:
+        assert cursor.execute("SELECT count(*) FROM items").fetchone() == (0,)
+
+
+def test_params_query_survives_write_to_other_table(conn):
+    query = "SELECT item FROM items WHERE value > ?"
+    assert conn._parse(query).tables == frozenset({"items"})
+    assert list(conn.query(query, params=[30])["item"]) == ["hammer"]
+    # Not made through the connection's cursors, so not tracked
+    conn._instance.execute("INSERT INTO items VALUES ('laptop', 2000)")
+    with conn.checkout() as cursor:
+        cursor.execute("INSERT INTO other VALUES (?, ?)", ["drill", 80])
+    assert list(conn.query(query, params=[30])["item"]) == ["hammer"]
+
+
+def test_named_params_query_reads_joined_tables(conn):
+    query = "SELECT i.item FROM items i JOIN other o USING (item) WHERE i.value < $limit"
+    assert conn._parse(query).tables == frozenset({"items", "other"})
@@ -0,0 +1,443 @@
+import asyncio
+import gzip
+from datetime import date
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+from files_connection import FilesConnection
+from files_connection.connection import _parse_fetched
+
+
+@pytest.fixture
+def conn():
+    # cache_max_bytes, since st.cache_data doesn't cache without a runtime
+    return FilesConnection("test", protocol="memory", cache_max_bytes=2**26)
+
+
+def test_dataset_date_partition_filter(conn):
+    for day in ("2024-01-01", "2024-01-02", "2024-01-03"):
+        conn.write(
+            pd.DataFrame({"x": [1]}),
+            f"/dates/date={day}/part.parquet",
+            output_format="parquet",
+        )
+    df = conn.read(
+        "/dates", "parquet", dataset=True, filters=[("date", ">=", date(2024, 1, 2))]
+    )
+    assert sorted(df["date"]) == [date(2024, 1, 2), date(2024, 1, 3)]
+
+
+def test_result_cache_returns_copies(conn):
+    conn.write(pd.DataFrame({"a": [1, 2]}), "/copies/data.parquet", output_format="parquet")
+    df = conn.read("/copies/data.parquet", "parquet")
+    df["a"] = 0
+    assert list(conn.read("/copies/data.parquet", "parquet")["a"]) == [1, 2]
+    assert conn.cache_stats()["parquet"]["hits"] == 1
+
+
+def test_read_incremental_appends(conn):
+    conn.fs.pipe("/tail/log.csv", b"a,b\n1,2\n")
+    assert list(conn.read_incremental("/tail/log.csv", "csv")["a"]) == [1]
+    conn.fs.pipe("/tail/log.csv", b"a,b\n1,2\n3,4\n")
+    assert list(conn.read_incremental("/tail/log.csv", "csv")["a"]) == [1, 3]
+
+
+def test_json_format_inference(conn):
+    conn.fs.pipe("/json/events.json", b'{"a": 1}\n{"a": 2}\n')
+    assert list(conn.read("/json/events.json")["a"]) == [1, 2]
+
+    conn.fs.pipe("/json/array.json", b'[{"a": 1}, {"a": 2}]')
+    conn.fs.pipe("/json/document.json", b'{\n  "a": 1\n}\n')
+    for path in ("/json/array.json", "/json/document.json"):
+        with pytest.raises(ValueError, match="Couldn't infer"):
+            conn.read(path)
+
+
+def test_disk_cache_evicts_older_entries(tmp_path):
+    conn = FilesConnection(
+        "disk-cache", protocol="memory", disk_cache_dir=str(tmp_path), disk_cache_max_bytes=50
+    )
+    conn.fs.pipe("/disk/a.txt", b"a" * 30)
+    conn.fs.pipe("/disk/b.txt", b"b" * 30)
+    assert conn.read("/disk/a.txt", "text") == "a" * 30
+    assert len(list(tmp_path.iterdir())) == 1
+    assert conn.read("/disk/b.txt", "text") == "b" * 30
+    # a.txt was evicted to fit b.txt, never the entry just fetched
+    assert [p.read_bytes() for p in tmp_path.iterdir()] == [b"b" * 30]
+
+
+def test_disk_cache_skips_objects_over_budget(tmp_path):
+    conn = FilesConnection(
+        "disk-cache-small", protocol="memory", disk_cache_dir=str(tmp_path), disk_cache_max_bytes=100
+    )
+    conn.write(pd.DataFrame({"a": range(100)}), "/disk/big.parquet", output_format="parquet")
+    conn.fs.pipe("/disk/big.txt", b"x" * 200)
+    assert list(conn.read("/disk/big.parquet", "parquet")["a"]) == list(range(100))
+    assert conn.read("/disk/big.txt", "text") == "x" * 200
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_read_incremental_header_completed_later(conn):
+    conn.fs.pipe("/tail/late-header.csv", b"a,b")
+    assert conn.read_incremental("/tail/late-header.csv", "csv") is None
+    conn.fs.pipe("/tail/late-header.csv", b"a,b\n1,2\n")
+    assert list(conn.read_incremental("/tail/late-header.csv", "csv")["a"]) == [1]
+    conn.fs.pipe("/tail/late-header.csv", b"a,b\n1,2\n3,4\n")
+    df = conn.read_incremental("/tail/late-header.csv", "csv")
+    assert list(df.columns) == ["a", "b"]
+    assert list(df["a"]) == [1, 3]
+
+
+@pytest.mark.parametrize("return_type", ["arrow", "polars"])
+def test_read_incremental_promotes_types(conn, return_type):
+    if return_type == "polars":
+        pytest.importorskip("polars")
+    path = f"/tail/promote-{return_type}.ndjson"
+    conn.fs.pipe(path, b'{"a": 1}\n')
+    conn.read_incremental(path, return_type=return_type)
+    conn.fs.pipe(path, b'{"a": 1}\n{"a": 1.5, "b": "x"}\n')
+    result = conn.read_incremental(path, return_type=return_type)
+    if return_type == "polars":
+        result = result.to_arrow()
+    assert result.column("a").to_pylist() == [1.0, 1.5]
+    assert result.column("b").to_pylist() == [None, "x"]
+
+
+def test_read_incremental_returns_copies(conn):
+    conn.fs.pipe("/tail/copies.csv", b"a\n1\n")
+    df = conn.read_incremental("/tail/copies.csv", "csv")
+    df["a"] = 0
+    assert list(conn.read_incremental("/tail/copies.csv", "csv")["a"]) == [1]
+
+
+def test_fs_pool_shares_only_async_filesystems():
+    import threading
+
+    from fsspec import register_implementation
+    from fsspec.asyn import AsyncFileSystem
+    from fsspec.spec import AbstractFileSystem
+
+    from files_connection.fs_pool import FilesystemPool
+
+    class PoolAsyncFileSystem(AsyncFileSystem):
+        protocol = "pool-async"
+
+    class PoolSyncFileSystem(AbstractFileSystem):
+        protocol = "pool-sync"
+
+    register_implementation("pool-async", PoolAsyncFileSystem, clobber=True)
+    register_implementation("pool-sync", PoolSyncFileSystem, clobber=True)
+    pool = FilesystemPool()
+
+    def in_thread(protocol, **kwargs):
+        result = []
+        thread = threading.Thread(target=lambda: result.append(pool.get(protocol, {}, **kwargs)))
+        thread.start()
+        thread.join()
+        return result[0]
+
+    shared = pool.get("pool-async", {})
+    assert in_thread("pool-async") is shared
+    assert pool.get("pool-async", {}, idle_timeout=-1) is not shared
+
+    # Sync filesystems aren't thread-safe, so each thread gets its own
+    assert in_thread("pool-sync") is not pool.get("pool-sync", {})
+
+
+@pytest.mark.parametrize("output_format", ["csv", "parquet", "feather", "orc"])
+def test_write_round_trip(conn, output_format):
+    if output_format == "orc":
+        pytest.importorskip("pyarrow.orc")
+    df = pd.DataFrame({"a": [1, 2], "b": ["x", "y"]})
+    path = f"/write/data.{output_format}"
+    conn.write(df, path, part_size=5 * 2**20)
+    pd.testing.assert_frame_equal(conn.read(path), df)
+
+
+def test_write_text_bytes_and_compression(conn):
+    conn.write("hello\n", "/write/hello.txt")
+    assert conn.read("/write/hello.txt", "text") == "hello\n"
+    conn.write(b"\x00\x01", "/write/raw.bin", output_format="bytes")
+    assert conn.read("/write/raw.bin", "bytes") == b"\x00\x01"
+    conn.write(pd.DataFrame({"a": [1]}), "/write/data.csv.gz")
+    assert conn.fs.cat_file("/write/data.csv.gz")[:2] == b"\x1f\x8b"
+    assert list(conn.read("/write/data.csv.gz")["a"]) == [1]
+
+
+def test_write_invalidates_cached_reads(conn):
+    conn.write(pd.DataFrame({"a": [1]}), "/write/cached.parquet")
+    conn.write(pd.DataFrame({"a": [5]}), "/write/other.parquet")
+    assert list(conn.read("/write/cached.parquet")["a"]) == [1]
+    assert list(conn.read("/write/other.parquet")["a"]) == [5]
+
+    conn.write(pd.DataFrame({"a": [2]}), "/write/cached.parquet")
+    assert list(conn.read("/write/cached.parquet")["a"]) == [2]
+    assert list(conn.read("/write/other.parquet")["a"]) == [5]
+    # Only the overwritten path missed the cache
+    assert conn.cache_stats()["parquet"]["misses"] == 3
+    assert "/write/cached.parquet" in conn.ls("/write")
+
+
+def test_csv_pyarrow_engine_keeps_pandas_arguments(conn):
+    conn.fs.pipe("/csv/semi.csv", b"a;b\n1;x\n2;y\n")
+    df = conn.read("/csv/semi.csv", engine="pyarrow", sep=";", usecols=["a"])
+    assert list(df.columns) == ["a"]
+    assert list(df["a"]) == [1, 2]
+
+
+def test_csv_schema_cache(conn):
+    pa = pytest.importorskip("pyarrow")
+    from pyarrow import csv
+
+    conn.fs.pipe("/csv/family/a.csv", b"id,code\n1,007\n2,010\n")
+    conn.fs.pipe("/csv/family/b.csv", b"id,code\n3,001\n")
+    first = conn.read("/csv/family/a.csv", return_type="arrow", schema_cache=True)
+    assert first.schema.field("code").type == pa.int64()
+    assert "/csv/family/*.csv" in conn._csv_schemas
+
+    # Later files in the family use the cached types instead of inferring them
+    conn._csv_schemas["/csv/family/*.csv"] = pa.schema(
+        [("id", pa.int64()), ("code", pa.string())]
+    )
+    second = conn.read("/csv/family/b.csv", return_type="arrow", schema_cache=True)
+    assert second.column("code").to_pylist() == ["001"]
+
+    # and pyarrow's options are accepted with pandas results
+    df = conn.read(
+        "/csv/family/b.csv",
+        schema_cache=True,
+        parse_options=csv.ParseOptions(delimiter=","),
+    )
+    assert list(df["code"]) == ["001"]
+
+
+def test_csv_schema_cache_falls_back_to_inference(conn):
+    pa = pytest.importorskip("pyarrow")
+
+    conn.fs.pipe("/csv/drift/a.csv", b"id,value\n1,2\n")
+    conn.fs.pipe("/csv/drift/b.csv", b"id,value\n2,not a number\n")
+    conn.read("/csv/drift/a.csv", return_type="arrow", schema_cache=True)
+    table = conn.read("/csv/drift/b.csv", return_type="arrow", schema_cache=True)
+    assert table.column("value").to_pylist() == ["not a number"]
+    assert conn._csv_schemas["/csv/drift/*.csv"].field("value").type == pa.string()
+
+
+def test_csv_without_schema_cache_infers_every_file(conn):
+    conn.fs.pipe("/csv/plain/a.csv", b"id\n1\n")
+    conn.read("/csv/plain/a.csv", return_type="arrow")
+    assert conn._csv_schemas == {}
+
+
+def test_glob_double_star_matches_zero_or_more_directories(conn):
+    for path in ["/g/x.parquet", "/g/a/y.parquet", "/g/a/b/z.parquet", "/g/a/w.csv"]:
+        conn.fs.pipe(path, b"")
+    assert conn.glob("/g/**/*.parquet") == [
+        "/g/a/b/z.parquet",
+        "/g/a/y.parquet",
+        "/g/x.parquet",
+    ]
+    assert conn.glob("/g/*.parquet") == ["/g/x.parquet"]
+    assert conn.glob("/g/*/*.parquet") == ["/g/a/y.parquet"]
+    assert conn.glob("/g/x.parquet") == ["/g/x.parquet"]
+
+
+def test_glob_refresh(conn):
+    conn.fs.pipe("/fresh/a.txt", b"a")
+    assert conn.glob("/fresh/*.txt") == ["/fresh/a.txt"]
+    # Written behind the connection's back, so the cached listing is stale
+    conn.fs.pipe("/fresh/b.txt", b"b")
+    assert conn.glob("/fresh/*.txt") == ["/fresh/a.txt"]
+    assert conn.glob("/fresh/*.txt", refresh=True) == ["/fresh/a.txt", "/fresh/b.txt"]
+
+
+def test_read_glob_skips_directories(conn):
+    conn.write(pd.DataFrame({"a": [1]}), "/gr/one.parquet")
+    conn.fs.pipe("/gr/dir.parquet/part-0.parquet", conn.fs.cat_file("/gr/one.parquet"))
+    assert "/gr/dir.parquet" in conn.glob("/gr/*.parquet")
+    assert list(conn.read("/gr/*.parquet")["a"]) == [1]
+
+
+def test_aread_infers_format_and_compression(conn):
+    conn.write(pd.DataFrame({"a": [1, 2]}), "/async/data.parquet")
+    conn.fs.pipe("/async/data.csv.gz", gzip.compress(b"a\n3\n"))
+    conn.fs.pipe("/async/events", gzip.compress(b'{"a": 4}\n'))
+
+    async def read_all():
+        return await asyncio.gather(
+            conn.aread("/async/data.parquet"),
+            conn.aread("/async/data.csv.gz"),
+            conn.aread("/async/events", return_type="arrow"),
+            conn.aread("/async/data.csv.gz", "bytes"),
+        )
+
+    parquet, csv, ndjson, raw = asyncio.run(read_all())
+    assert list(parquet["a"]) == [1, 2]
+    assert list(csv["a"]) == [3]
+    assert ndjson.column("a").to_pylist() == [4]
+    assert raw[:2] == b"\x1f\x8b"
+
+
+def test_aread_rejects_unknown_format(conn):
+    with pytest.raises(ValueError):
+        asyncio.run(conn.aread("/async/data.parquet", "xlsx"))
+
+
+def test_aopen_requires_async_filesystem(conn):
+    async def open_file():
+        async with conn.aopen("/async/data.parquet"):
+            pass
+
+    with pytest.raises(NotImplementedError):
+        asyncio.run(open_file())
+
+
+def test_parse_fetched_decompresses_and_infers_format():
+    data = gzip.compress(b'{"a": 1}\n{"a": 2}\n')
+    table = _parse_fetched("bucket/events", data, None, "arrow")
+    assert table.column("a").to_pylist() == [1, 2]
+    df = _parse_fetched("bucket/data.csv.gz", gzip.compress(b"a\n5\n"), "csv", "pandas")
+    assert list(df["a"]) == [5]
+    with pytest.raises(ValueError):
+        _parse_fetched("bucket/unknown", b"\x00\x01", None, "arrow")
+
+
+def test_cache_stats_counts_hits_and_misses(conn):
+    conn.write(pd.DataFrame({"a": [1, 2]}), "/stats/data.parquet")
+    conn.fs.pipe("/stats/data.txt", b"hello")
+    for _ in range(3):
+        conn.read("/stats/data.parquet")
+    conn.read("/stats/data.txt")
+
+    stats = conn.cache_stats()
+    assert stats["parquet"]["hits"] == 2
+    assert stats["parquet"]["misses"] == 1
+    assert stats["parquet"]["bytes"] > 0
+    assert stats["text"]["misses"] == 1
+
+
+@pytest.mark.parametrize("input_format", ["csv", "parquet", "feather", "ndjson"])
+def test_read_return_types(conn, input_format):
+    pa = pytest.importorskip("pyarrow")
+    pl = pytest.importorskip("polars")
+
+    path = f"/types/data.{input_format}"
+    if input_format == "ndjson":
+        conn.fs.pipe(path, b'{"a": 1}\n{"a": 2}\n')
+    else:
+        conn.write(pd.DataFrame({"a": [1, 2]}), path)
+
+    df = conn.read(path, input_format)
+    assert isinstance(df, pd.DataFrame)
+    table = conn.read(path, input_format, return_type="arrow")
+    assert isinstance(table, pa.Table)
+    assert table.column("a").to_pylist() == [1, 2]
+    polars_df = conn.read(path, input_format, return_type="polars")
+    assert isinstance(polars_df, pl.DataFrame)
+    assert polars_df["a"].to_list() == [1, 2]
+
+    with pytest.raises(ValueError):
+        conn.read(path, input_format, return_type="numpy")
+
+
+def test_parquet_column_and_filter_pushdown(conn):
+    df = pd.DataFrame({"a": [1, 2, 3], "b": ["x", "y", "z"]})
+    conn.write(df, "/pushdown/data.parquet")
+
+    projected = conn.read("/pushdown/data.parquet", columns=["b"])
+    assert list(projected.columns) == ["b"]
+    filtered = conn.read("/pushdown/data.parquet", filters=[("a", ">", 1)])
+    assert list(filtered["b"]) == ["y", "z"]
+    # Both are part of the cache key
+    assert list(conn.read("/pushdown/data.parquet").columns) == ["a", "b"]
+    assert conn.cache_stats()["parquet"]["misses"] == 3
+
+
+def test_read_iter_chunks(conn):
+    pa = pytest.importorskip("pyarrow")
+
+    df = pd.DataFrame({"a": range(5)})
+    conn.write(df, "/iter/data.csv")
+    conn.write(df, "/iter/data.parquet")
+    conn.fs.pipe("/iter/data.txt", b"abcdefg")
+
+    chunks = list(conn.read_iter("/iter/data.csv", chunksize=2))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert list(pd.concat(chunks)["a"]) == list(range(5))
+
+    batches = list(
+        conn.read_iter("/iter/data.parquet", "parquet", chunksize=2, return_type="arrow")
+    )
+    assert all(isinstance(batch, pa.RecordBatch) for batch in batches)
+    assert sum(batch.num_rows for batch in batches) == 5
+
+    assert list(conn.read_iter("/iter/data.txt", "text", chunksize=3)) == [
+        "abc",
+        "def",
+        "g",
+    ]
+    with pytest.raises(ValueError):
+        list(conn.read_iter("/iter/data.txt", "orc"))
+
+
+def test_local_memory_mapped_reads(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+
+    conn = FilesConnection("local-mmap", protocol="file", cache_max_bytes=2**26)
+    df = pd.DataFrame({"a": [1, 2, 3]})
+    conn.write(df, str(tmp_path / "data.feather"))
+    conn.write(df, str(tmp_path / "data.parquet"))
+
+    for _ in range(2):
+        table = conn.read(str(tmp_path / "data.feather"), return_type="arrow")
+        assert isinstance(table, pa.Table)
+        assert table.column("a").to_pylist() == [1, 2, 3]
+    # Zero-copy Feather reads bypass the cache, and every one is a miss
+    assert conn.cache_stats()["feather"]["misses"] == 2
+    assert conn.cache_stats()["feather"]["hits"] == 0
+
+    pd.testing.assert_frame_equal(conn.read(str(tmp_path / "data.parquet")), df)
+    pd.testing.assert_frame_equal(conn.read(str(tmp_path / "data.feather")), df)
+
+
+def test_byte_range_reads(conn):
+    conn.fs.pipe("/range/data.txt", "héllo world".encode())
+    assert conn.read("/range/data.txt", "bytes", byte_range=(0, 5)) == b"h\xc3\xa9ll"
+    assert conn.read("/range/data.txt", "bytes", byte_range=(-5, None)) == b"world"
+    assert conn.read("/range/data.txt", "text", byte_range=(7, None)) == "world"
+    # A range ending inside a multi-byte character doesn't fail to decode
+    assert conn.read("/range/data.txt", "text", byte_range=(0, 2)) == "h�"
+
+
+def test_open_defaults(monkeypatch):
+    conn = FilesConnection(
+        "open-defaults", protocol="memory", block_size=2**20, cache_type="readahead"
+    )
+    opened = {}
+
+    def fake_open(path, mode="rb", **kwargs):
+        opened.update(kwargs)
+
+    monkeypatch.setattr(conn.fs, "open", fake_open)
+    conn.open("/defaults/data.txt")
+    assert opened == {"block_size": 2**20, "cache_type": "readahead"}
+    # Arguments passed to open() win over the defaults
+    conn.open("/defaults/data.txt", cache_type="bytes")
+    assert opened["cache_type"] == "bytes"
+
+
+def test_read_many_files(conn):
+    for i in range(3):
+        conn.write(pd.DataFrame({"a": [i]}), f"/many/part-{i}.parquet")
+        conn.write(pd.DataFrame({"a": [i]}), f"/many/part-{i}.csv")
+
+    assert list(conn.read("/many/*.parquet")["a"]) == [0, 1, 2]
+    assert list(conn.read("/many/*.csv", max_workers=2)["a"]) == [0, 1, 2]
+    paths = ["/many/part-2.csv", "/many/part-0.csv"]
+    assert list(conn.read(paths)["a"]) == [2, 0]
+    table = conn.read("/many/*.parquet", return_type="arrow")
+    assert table.num_rows == 3
+    with pytest.raises(FileNotFoundError):
+        conn.read("/many/*.orc")